@@ -0,0 +1,402 @@
+import bisect
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import httpx
+from ollama import Client
+
+from smard_cache import ResponseCache
+
+OLLAMA_HOST = "http://host.docker.internal:11434"
+DEFAULT_MODEL = "llama3:8b"
+
+# HTTP settings of the shared Ollama client. The read timeout bounds the gap
+# between streamed tokens (and the wait for the first one); failed connection
+# attempts are retried, requests that reached Ollama are not.
+OLLAMA_CONNECT_TIMEOUT = 5.0
+OLLAMA_READ_TIMEOUT = 120.0
+OLLAMA_CONNECT_RETRIES = 2
+
+# Context window requested for every call. Ollama otherwise uses its own
+# default (2048 or 4096 tokens, depending on the version) and silently drops
+# the head of longer prompts.
+OLLAMA_NUM_CTX = 8192
+
+# Persistent cache of finished responses; least recently used entries are
+# evicted beyond AI_CACHE_MAX_MB.
+AI_CACHE_DIR = "ai_cache"
+AI_CACHE_MAX_MB = 64
+
+# Upper bounds in seconds of the latency histogram buckets.
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, float("inf"))
+
+# Ollama generations allowed at once across all dashboard sessions of this
+# process; further jobs wait for a slot so the local Ollama host is not overloaded.
+MAX_CONCURRENT_CALLS = 2
+_call_slots = threading.BoundedSemaphore(MAX_CONCURRENT_CALLS)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    Return the process-wide Ollama client, created on first use. Its httpx
+    connection pool keeps connections to Ollama alive between calls, and it
+    is shared by all jobs and dashboard sessions.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = Client(
+                host=OLLAMA_HOST,
+                timeout=httpx.Timeout(OLLAMA_READ_TIMEOUT, connect=OLLAMA_CONNECT_TIMEOUT),
+                transport=httpx.HTTPTransport(retries=OLLAMA_CONNECT_RETRIES),
+            )
+        return _client
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Return the process-wide AI response cache, created on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(AI_CACHE_DIR, max_bytes=AI_CACHE_MAX_MB * 1024 * 1024)
+        return _cache
+
+def response_cache_key(model, prompt, content):
+    """Cache key of a response: the model plus hashes of the prompt and of the input content."""
+    prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+    content_hash = hashlib.sha256(content.encode()).hexdigest()
+    return f"ollama/{model}/{prompt_hash}/{content_hash}"
+
+def format_cache_stats():
+    """
+    Describe the AI response cache. Hits and misses count user requests; the
+    section summaries of map-reduce summaries are counted separately.
+    """
+    cache = get_cache()
+    hits, misses = cache.stats["hits"], cache.stats["misses"]
+    hit_rate = hits / (hits + misses) * 100 if hits + misses else 0.0
+    section_hits = cache.stats.get("section_hits", 0)
+    sections = section_hits + cache.stats.get("section_misses", 0)
+    return (
+        f"AI response cache: {hits} hits, {misses} misses ({hit_rate:.1f}% hit rate), "
+        f"{section_hits} of {sections} section summaries reused, "
+        f"{cache.stats['evictions']} evictions, {cache.total_bytes() / (1024 * 1024):.1f} MiB on disk."
+    )
+
+class LatencyHistogram:
+    """Counts of observed latencies per LATENCY_BUCKETS bucket, plus their sum."""
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+# (model, metric) -> LatencyHistogram for the metrics "first token" and "total".
+latency_histograms = {}
+_histogram_lock = threading.Lock()
+
+def record_latency(model, metric, seconds):
+    with _histogram_lock:
+        latency_histograms.setdefault((model, metric), LatencyHistogram()).observe(seconds)
+
+def latency_table():
+    """
+    Return the latency histograms as rows of (model, metric, calls, mean
+    seconds, {bucket label: count}), for display in the dashboard.
+    """
+    labels = [f"≤{bound:g}s" if bound != float("inf") else f">{LATENCY_BUCKETS[-2]:g}s" for bound in LATENCY_BUCKETS]
+    with _histogram_lock:
+        return [
+            (model, metric, histogram.count, histogram.total / histogram.count, dict(zip(labels, histogram.counts)))
+            for (model, metric), histogram in sorted(latency_histograms.items())
+        ]
+
+class JobCancelled(Exception):
+    """Raised inside a job's worker thread once the job has been cancelled."""
+
+class ChatJob:
+    """
+    A chat completion streamed from Ollama in a background thread. The
+    Streamlit script polls `text` and `status` to render tokens as they
+    arrive; cancel() stops the generation at the next token and closes the
+    connection, which makes Ollama abandon it too.
+    key identifies the inputs the job was started for; a finished response
+    is stored in the AI response cache under cache_key, if given.
+    """
+
+    def __init__(self, key, messages, model=DEFAULT_MODEL, cache_key=None):
+        self.key = key
+        self.messages = messages
+        self.model = model
+        self.cache_key = cache_key
+        self.cached = False
+        self.status = "queued"  # queued | running | done | cancelled | error
+        self.error = None
+        self.started_at = time.perf_counter()
+        self.elapsed = None
+        self._parts = []
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def text(self):
+        with self._lock:
+            return "".join(self._parts)
+
+    @property
+    def finished(self):
+        return self.status in ("done", "cancelled", "error")
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _check_cancelled(self):
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def _run(self):
+        try:
+            self._generate()
+            if self.cache_key is not None:
+                get_cache().store(self.cache_key, self.text.encode())
+            self._finish("done")
+        except JobCancelled:
+            self._finish("cancelled")
+        except Exception as e:
+            self.error = e
+            self._finish("error")
+
+    def _generate(self):
+        self._chat(self.messages, on_token=self._append)
+
+    def _append(self, token):
+        with self._lock:
+            self._parts.append(token)
+
+    def _chat(self, messages, on_token=None):
+        """
+        Stream one chat call within a concurrency slot and return its text,
+        passing each token to on_token. Raises JobCancelled when cancelled.
+        """
+        while not _call_slots.acquire(timeout=0.2):
+            self._check_cancelled()
+        try:
+            self._check_cancelled()
+            self.status = "running"
+            # Latencies are measured from the moment the call got its slot.
+            call_started = time.perf_counter()
+            first_token = True
+            tokens = []
+            stream = get_client().chat(
+                model=self.model, messages=messages, stream=True, options={"num_ctx": OLLAMA_NUM_CTX}
+            )
+            try:
+                for chunk in stream:
+                    if first_token:
+                        record_latency(self.model, "first token", time.perf_counter() - call_started)
+                        first_token = False
+                    self._check_cancelled()
+                    token = chunk["message"]["content"]
+                    tokens.append(token)
+                    if on_token is not None:
+                        on_token(token)
+            finally:
+                stream.close()
+            record_latency(self.model, "total", time.perf_counter() - call_started)
+            return "".join(tokens)
+        finally:
+            _call_slots.release()
+
+    def _finish(self, status):
+        self.elapsed = time.perf_counter() - self.started_at
+        self.status = status
+
+def _user_message(prompt):
+    return [{"role": "user", "content": prompt}]
+
+def _cached_job(job):
+    """Return job already finished from the AI response cache, or None on a miss."""
+    cache = get_cache()
+    entry = cache.lookup(job.cache_key)
+    if entry is None:
+        cache.count("misses")
+        return None
+    cache.count("hits")
+    job._parts.append(entry[0].decode())
+    job.cached = True
+    job._finish("done")
+    return job
+
+def start_chat(key, prompt, model=DEFAULT_MODEL, cache_key=None):
+    """
+    Start a background ChatJob for a single user prompt. With a cache_key
+    (see response_cache_key) a cached response is returned as an already
+    finished job instead of calling Ollama.
+    """
+    job = ChatJob(key, _user_message(prompt), model, cache_key)
+    if cache_key is not None and _cached_job(job) is not None:
+        return job
+    return job.start()
+
+# Map-reduce summarization of long texts. Token counts are estimated at
+# about four characters per token, which holds well enough for English and
+# German prose; the budgets leave room for the prompt and the answer within
+# the OLLAMA_NUM_CTX context requested for each call.
+CHARS_PER_TOKEN = 4
+SUMMARY_CHUNK_TOKENS = 1500
+SUMMARY_REDUCE_TOKENS = 3000
+# Combination rounds before whatever is left goes into the final combination.
+SUMMARY_MAX_REDUCE_ROUNDS = 3
+# Chunk summaries requested at once by one job (the global slot limit still applies).
+SUMMARY_MAP_CONCURRENCY = 2
+
+SUMMARY_PROMPT = "Summarize the following text:"
+MAP_PROMPT = "Summarize the following section of a longer document. Keep the key facts and figures:"
+REDUCE_PROMPT = "Combine the following summaries of consecutive sections of one document into a single coherent summary:"
+# Used when no two partial summaries fit into one reduce prompt together;
+# 700 words are roughly 1000 tokens, so two shortened partials fit.
+SUMMARY_CONDENSE_WORDS = 700
+CONDENSE_PROMPT = f"Shorten the following summary to at most {SUMMARY_CONDENSE_WORDS} words, keeping the key facts and figures:"
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def split_into_chunks(text, max_tokens=SUMMARY_CHUNK_TOKENS):
+    """
+    Split text into consecutive chunks of at most max_tokens (estimated),
+    breaking between lines where possible and hard-splitting longer lines.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    current_chars = 0
+    for line in text.splitlines():
+        while len(line) > max_chars:
+            chunks.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and current_chars + len(line) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current = []
+            current_chars = 0
+        current.append(line)
+        current_chars += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+class SummaryJob(ChatJob):
+    """
+    Map-reduce summary of a long text: the chunks from split_into_chunks are
+    summarized concurrently, the partial summaries are combined in rounds
+    until they fit one prompt, and the final summary is streamed into `text`.
+    Partials still too long after SUMMARY_MAX_REDUCE_ROUNDS are cut to an
+    equal share of the prompt, and `truncated` is set.
+    `progress` is (calls done, calls planned) and `stage` describes the step.
+    """
+
+    def __init__(self, key, text, model=DEFAULT_MODEL, cache_key=None):
+        super().__init__(key, None, model, cache_key)
+        self.source_text = text
+        self.chunks = split_into_chunks(text)
+        self.progress = (0, 0)
+        self.stage = "Waiting for a free Ollama slot..."
+        self.truncated = False
+
+    def _generate(self):
+        if len(self.chunks) <= 1:
+            self.progress = (0, 1)
+            self.stage = "Summarizing"
+            self._chat(_user_message(f"{SUMMARY_PROMPT}\n\n{self.source_text}"), on_token=self._append)
+        else:
+            partials = self._map(self.chunks, MAP_PROMPT, "Summarizing")
+            for _ in range(SUMMARY_MAX_REDUCE_ROUNDS):
+                if estimate_tokens("\n\n".join(partials)) <= SUMMARY_REDUCE_TOKENS:
+                    break
+                groups = self._group(partials)
+                if len(groups) < len(partials):
+                    partials = self._map(groups, REDUCE_PROMPT, "Combining")
+                else:
+                    # No two partials fit together, so shorten each one first.
+                    partials = self._map(partials, CONDENSE_PROMPT, "Shortening")
+            if estimate_tokens("\n\n".join(partials)) > SUMMARY_REDUCE_TOKENS:
+                partials = self._truncate(partials)
+            self.stage = "Combining section summaries"
+            self._chat(_user_message(f"{REDUCE_PROMPT}\n\n" + "\n\n".join(partials)), on_token=self._append)
+        self.progress = (self.progress[1], self.progress[1])
+        record_latency(self.model, "map-reduce summary", time.perf_counter() - self.started_at)
+
+    def _group(self, partials):
+        """Join consecutive partial summaries into groups that fit SUMMARY_REDUCE_TOKENS."""
+        groups = [[]]
+        for partial in partials:
+            if groups[-1] and estimate_tokens("\n\n".join(groups[-1] + [partial])) > SUMMARY_REDUCE_TOKENS:
+                groups.append([])
+            groups[-1].append(partial)
+        return ["\n\n".join(group) for group in groups]
+
+    def _truncate(self, partials):
+        """Cut every partial summary to an equal share of SUMMARY_REDUCE_TOKENS."""
+        self.truncated = True
+        share = SUMMARY_REDUCE_TOKENS * CHARS_PER_TOKEN // len(partials) - 2
+        return [partial[:share] for partial in partials]
+
+    def _map(self, texts, prompt, stage):
+        """Run prompt on texts concurrently, keeping their order; cached results are reused."""
+        done = self.progress[0]
+        # Planned calls: this round plus the final combination.
+        self.progress = (done, done + len(texts) + 1)
+        self.stage = f"{stage} {len(texts)} sections"
+        results = [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=SUMMARY_MAP_CONCURRENCY) as executor:
+            futures = {
+                executor.submit(self._summarize_part, prompt, text): number
+                for number, text in enumerate(texts)
+            }
+            try:
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+                    self.progress = (self.progress[0] + 1, self.progress[1])
+            except BaseException:
+                self.cancel()
+                raise
+        return results
+
+    def _summarize_part(self, prompt, text):
+        cache_key = response_cache_key(self.model, prompt, text)
+        cache = get_cache()
+        entry = cache.lookup(cache_key)
+        if entry is not None:
+            cache.count("section_hits")
+            return entry[0].decode()
+        cache.count("section_misses")
+        summary = self._chat(_user_message(f"{prompt}\n\n{text}"))
+        cache.store(cache_key, summary.encode())
+        return summary
+
+def start_summary(key, text, model=DEFAULT_MODEL):
+    """
+    Start a background map-reduce SummaryJob for text; a summary of the
+    same text from the AI response cache is returned as a finished job.
+    """
+    job = SummaryJob(key, text, model, response_cache_key(model, SUMMARY_PROMPT, text))
+    if _cached_job(job) is not None:
+        return job
+    return job.start()
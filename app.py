@@ -1,21 +1,126 @@
+import hashlib
+import tempfile
+
 import streamlit as st
 import psycopg2
 import pandas as pd
 import altair as alt
 import pdfplumber
-from ollama import Client
-
-def load_data():
-    """Connect to the PostgreSQL database and load data into a Pandas DataFrame."""
-    conn = psycopg2.connect(
-        host="db",
-        database="energydata",
-        user="user",
-        password="password"
-    )
-    df = pd.read_sql_query("SELECT * FROM energy_timeseries", conn)
-    conn.close()
-    return df
+
+import ai_jobs
+import dashboard_data
+import downsampling
+import export
+from db import DB_SETTINGS
+from schema import migrate
+
+@st.cache_resource
+def init_schema():
+    """Run pending schema migrations once per dashboard process."""
+    conn = psycopg2.connect(**DB_SETTINGS)
+    try:
+        return migrate(conn)
+    finally:
+        conn.close()
+
+# Dashboard query cache: entries expire after CACHE_TTL_SECONDS, at most
+# CACHE_MAX_ENTRIES results are kept per query, and every query takes the ETL
+# load generation as an argument so a finished load invalidates old results.
+CACHE_TTL_SECONDS = 600
+CACHE_MAX_ENTRIES = 64
+
+# Width of the bar chart in pixels. The chart uses the coarsest rollup that
+# still gives at least one bar per CHART_PIXELS_PER_POINT pixels.
+CHART_WIDTH = 700
+CHART_PIXELS_PER_POINT = 2
+# Default cap on the points sent to the browser; the sidebar can change it.
+CHART_MAX_POINTS = 1000
+ROLLUP_LABELS = {"hour": "hourly", "day": "daily", "week": "weekly", "month": "monthly"}
+
+TABLE_PAGE_SIZES = (100, 500, 1000)
+EXPORT_MIME_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+# How often a running AI job's streamed output is redrawn, in seconds.
+AI_POLL_SECONDS = 0.5
+
+def current_load_generation():
+    """Read the ETL load generation (one single-row query per rerun)."""
+    conn = dashboard_data.connect()
+    try:
+        return dashboard_data.load_generation(conn)
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_options(generation):
+    """Load the list of available series for the sidebar."""
+    conn = dashboard_data.connect()
+    try:
+        return dashboard_data.load_series_options(conn)
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_bounds(generation, series_id):
+    """Load the first and last timestamp (ms) of the selected series."""
+    conn = dashboard_data.connect()
+    try:
+        return dashboard_data.load_series_bounds(conn, series_id)
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_data(generation, series_id, start_date, end_date, float32=False):
+    """Load only the selected series and date range into a compact Pandas DataFrame."""
+    conn = dashboard_data.connect()
+    try:
+        return dashboard_data.load_series_data(conn, series_id, start_date, end_date, float32)
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_chart(generation, series_id, resolution, start_date, end_date):
+    """Load the chart points of the selected series: a rollup or the raw rows."""
+    conn = dashboard_data.connect()
+    try:
+        return dashboard_data.load_chart_data(
+            conn, series_id, resolution, start_date, end_date, CHART_WIDTH // CHART_PIXELS_PER_POINT
+        )
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_row_count(generation, series_id, start_date, end_date):
+    """Count the rows of the selected series and date range."""
+    conn = dashboard_data.connect()
+    try:
+        return dashboard_data.count_series_rows(conn, series_id, start_date, end_date)
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def load_page(generation, series_id, start_date, end_date, after_timestamp, page_size):
+    """Load one keyset-paginated page of the data table."""
+    conn = dashboard_data.connect()
+    try:
+        return dashboard_data.load_series_page(conn, series_id, start_date, end_date, after_timestamp, page_size)
+    finally:
+        conn.close()
+
+def export_slice(series_id, start_date, end_date, export_format):
+    """
+    Stream the selected slice from PostgreSQL into a temporary file; only runs
+    when the download is requested. Returns the file's bytes, as Streamlit
+    needs them for the download; the file is removed again.
+    """
+    with tempfile.TemporaryFile() as out:
+        conn = dashboard_data.connect()
+        try:
+            export.EXPORTERS[export_format](conn, series_id, start_date, end_date, out)
+        finally:
+            conn.close()
+        out.seek(0)
+        return out.read()
 
 def extract_text_from_pdf(pdf_file):
     """Extracts text from a PDF file using pdfplumber."""
@@ -26,73 +131,158 @@ def extract_text_from_pdf(pdf_file):
     except Exception as e:
         return f"Error extracting text from PDF: {e}"
 
-def summarize_text_with_ollama(text, model="llama3:8b"):
-    """Sends extracted text to Ollama for summarization."""
-    try:
-        client = Client(host="http://host.docker.internal:11434")  # Connect to host machine running Ollama
-        prompt = f"Summarize the following text:\n\n{text[:3000]}..."  # Limit text length for response efficiency
-        response = client.chat(model=model, messages=[{"role": "user", "content": prompt}])
-        return response['message']['content']
-    except Exception as e:
-        return f"Error with Ollama: {e}"
+def summarize_text_with_ollama(text, key, model=ai_jobs.DEFAULT_MODEL):
+    """
+    Starts a map-reduce summary of the whole extracted text with Ollama in
+    the background; returns the SummaryJob.
+    """
+    return ai_jobs.start_summary(key, text, model)
+
+def replace_job(state_key, job):
+    """Store job under state_key, cancelling the job it replaces."""
+    cancel_job(state_key)
+    st.session_state[state_key] = job
+
+def cancel_job(state_key, unless_key=None):
+    """Cancel and forget the job under state_key, unless it was started for unless_key."""
+    job = st.session_state.get(state_key)
+    if job is not None and (unless_key is None or job.key != unless_key):
+        job.cancel()
+        del st.session_state[state_key]
+
+@st.fragment(run_every=AI_POLL_SECONDS)
+def poll_job(state_key):
+    """Redraw a running job's streamed output; reruns the whole page once it has finished."""
+    job = st.session_state.get(state_key)
+    if job is None:
+        return
+    progress = getattr(job, "progress", None)
+    if progress is not None and progress[1]:
+        st.progress(progress[0] / progress[1], text=f"{job.stage} ({progress[0]}/{progress[1]} calls)")
+    st.markdown(job.text + " ▌")
+    st.caption("Waiting for a free Ollama slot..." if job.status == "queued" else "Generating...")
+    if st.button("Cancel", key=f"{state_key}_cancel"):
+        job.cancel()
+    if job.finished:
+        st.rerun()
+
+def render_job(state_key, title):
+    """Show the job under state_key: streamed while running, then its final result."""
+    job = st.session_state.get(state_key)
+    if job is None:
+        return
+    st.subheader(title)
+    if not job.finished:
+        poll_job(state_key)
+    elif job.status == "error":
+        st.error(f"Error with Ollama: {job.error}")
+    else:
+        st.write(job.text)
+        if job.cached:
+            st.caption("Served from the AI response cache.")
+        else:
+            status = "Cancelled after" if job.status == "cancelled" else "Generated in"
+            chunks = f" from {len(job.chunks)} sections" if len(getattr(job, "chunks", ())) > 1 else ""
+            st.caption(f"{status} {job.elapsed:.1f}s{chunks}.")
+            if getattr(job, "truncated", False):
+                st.warning("The section summaries were too long to combine in full; each was shortened before the final summary.")
 
 def main():
     st.title("Energy Timeseries Data Dashboard")
     st.write("This dashboard shows the energy data loaded into the PostgreSQL database.")
 
     try:
-        data = load_data()
-        if data.empty:
+        init_schema()
+        generation = current_load_generation()
+        options = load_options(generation)
+        if options.empty:
             st.warning("No data available. Please ensure the ETL process has inserted data.")
             return
 
-        # Convert timestamp (assumed in milliseconds) to datetime and sort.
-        data['datetime'] = pd.to_datetime(data['timestamp'], unit='ms')
-        data = data.sort_values(by='datetime')
-
         # Sidebar filters for filter label, region, and resolution.
         st.sidebar.header("Filter Data")
-        filter_labels = sorted(data['filter_label'].unique())
+        filter_labels = sorted(options['filter_label'].unique())
         selected_filter = st.sidebar.selectbox("Select Filter", filter_labels)
-        
-        region_options = sorted(data['region'].unique())
+        options = options[options['filter_label'] == selected_filter]
+
+        region_options = sorted(options['region'].unique())
         selected_region = st.sidebar.selectbox("Select Region", region_options)
-        
-        resolution_options = sorted(data['resolution'].unique())
+        options = options[options['region'] == selected_region]
+
+        resolution_options = sorted(options['resolution'].unique())
         selected_resolution = st.sidebar.selectbox("Select Resolution", resolution_options)
-        
-        # Filter data based on sidebar selections.
-        filtered_data = data[
-            (data['filter_label'] == selected_filter) &
-            (data['region'] == selected_region) &
-            (data['resolution'] == selected_resolution)
-        ]
-        
-        # Date range filter based on the filtered data (or fallback to overall date range).
-        if not filtered_data.empty:
-            min_date = filtered_data['datetime'].min().date()
-            max_date = filtered_data['datetime'].max().date()
-        else:
-            min_date = data['datetime'].min().date()
-            max_date = data['datetime'].max().date()
+        selected_series_id = int(options.loc[options['resolution'] == selected_resolution, 'series_id'].iloc[0])
+
+        # Date range filter based on the first and last timestamp of the selected series.
+        min_ts, max_ts = load_bounds(generation, selected_series_id)
+        min_date = pd.to_datetime(min_ts, unit='ms').date()
+        max_date = pd.to_datetime(max_ts, unit='ms').date()
         date_range = st.sidebar.date_input("Select date range", [min_date, max_date], min_value=min_date, max_value=max_date)
         if len(date_range) == 2:
             start_date, end_date = date_range
-            filtered_data = filtered_data[(filtered_data['datetime'].dt.date >= start_date) & (filtered_data['datetime'].dt.date <= end_date)]
-        
+        else:
+            start_date, end_date = min_date, max_date
+
+        st.sidebar.header("Chart")
+        max_chart_points = st.sidebar.number_input(
+            "Max chart points", min_value=100, max_value=20000, value=CHART_MAX_POINTS, step=100
+        )
+        downsampling_method = st.sidebar.selectbox("Downsampling", list(downsampling.DOWNSAMPLERS))
+
+        # Only the visible page of the table is fetched and sent to the browser.
         st.subheader("Data Table")
-        st.dataframe(filtered_data)
+        page_size = st.selectbox("Rows per page", TABLE_PAGE_SIZES)
+        table_key = (selected_series_id, start_date, end_date, page_size)
+        if st.session_state.get("table_key") != table_key:
+            st.session_state["table_key"] = table_key
+            # Keyset cursors: the last timestamp before each visited page (None for the first).
+            st.session_state["table_cursors"] = [None]
+        cursors = st.session_state["table_cursors"]
+        total_rows = load_row_count(generation, selected_series_id, start_date, end_date)
+        page = load_page(generation, selected_series_id, start_date, end_date, cursors[-1], page_size)
+        first_row = (len(cursors) - 1) * page_size
+        st.dataframe(page, hide_index=True)
+
+        previous_column, info_column, next_column = st.columns([1, 3, 1])
+        previous_column.button("Previous", on_click=cursors.pop, disabled=len(cursors) == 1)
+        info_column.caption(f"Rows {first_row + 1 if len(page) else 0}–{first_row + len(page)} of {total_rows}")
+        next_column.button(
+            "Next",
+            on_click=cursors.append,
+            args=(int(page["timestamp"].iloc[-1]) if len(page) else None,),
+            disabled=first_row + len(page) >= total_rows,
+        )
+        format_column, download_column = st.columns([1, 3])
+        export_format = format_column.selectbox("Export format", export.EXPORT_FORMATS)
+        download_column.download_button(
+            f"Download {export_format.upper()}",
+            data=lambda: export_slice(selected_series_id, start_date, end_date, export_format),
+            file_name=f"energy_{selected_filter}_{selected_region}_{selected_resolution}_{start_date}_{end_date}.{export_format}",
+            mime=EXPORT_MIME_TYPES[export_format],
+        )
         
         st.subheader("Interactive Bar Plot (Selected Filter)")
-        if filtered_data.empty:
+        granularity, chart_data = load_chart(generation, selected_series_id, selected_resolution, start_date, end_date)
+        if chart_data.empty:
             st.info("No data available for the selected filters and date range.")
         else:
-            chart = alt.Chart(filtered_data).mark_bar().encode(
+            if granularity is None:
+                tooltip = ["datetime:T", "value:Q"]
+            else:
+                st.caption(f"Showing {len(chart_data)} {ROLLUP_LABELS[granularity]} means; hover a bar for its min and max.")
+                tooltip = ["datetime:T", "value:Q", "min_value:Q", "max_value:Q", "value_count:Q"]
+            # Cap the points serialized to the browser; the table keeps every row.
+            # downsample() drops rows without a value before sampling.
+            point_count = int(chart_data["value"].notna().sum())
+            chart_data = downsampling.downsample(chart_data, max_chart_points, downsampling_method)
+            if point_count > max_chart_points:
+                st.caption(f"Downsampled {point_count} points to {len(chart_data)} ({downsampling_method}).")
+            chart = alt.Chart(chart_data).mark_bar().encode(
                 x=alt.X("datetime:T", title="Time", axis=alt.Axis(labelAngle=-45)),
                 y=alt.Y("value:Q", title="Energy Value"),
-                tooltip=["datetime:T", "value:Q"]
+                tooltip=tooltip
             ).properties(
-                width=700,
+                width=CHART_WIDTH,
                 height=400,
                 title=f"Energy Data: {selected_filter} | {selected_region} | {selected_resolution}"
             ).interactive()
@@ -110,36 +300,49 @@ def main():
                 st.subheader("Extracted Text (Preview)")
                 st.text_area("Extracted Text", pdf_text[:1000], height=200)  # Show first 1000 chars
                 
+                # A summary started for another file is cancelled.
+                summary_key = hashlib.sha256(pdf_text.encode()).hexdigest()
+                cancel_job("summary_job", unless_key=summary_key)
                 if st.button("Summarize with AI"):
-                    with st.spinner("Generating AI Summary..."):
-                        summary = summarize_text_with_ollama(pdf_text)
-                    st.subheader("AI-Generated Summary")
-                    st.write(summary)
+                    replace_job("summary_job", summarize_text_with_ollama(pdf_text, summary_key))
+                render_job("summary_job", "AI-Generated Summary")
             else:
                 st.error("No text extracted from the PDF. Please try another file.")
+        else:
+            cancel_job("summary_job")
 
         # AI Data Description Section
         st.subheader("AI Data Description")
         prompt = st.text_area("Enter a prompt for the AI to describe the data", value="Please describe the following energy data:")
+        float32_values = st.checkbox("Load values as float32 (half the memory, about 7 significant digits)")
+        # A description started for other inputs is cancelled.
+        description_key = (prompt, selected_series_id, start_date, end_date, float32_values)
+        cancel_job("description_job", unless_key=description_key)
         if st.button("Get AI Description"):
-            try:
-                client = Client(host="http://host.docker.internal:11434")
-
-                def get_ai_response(prompt):
-                    response = client.chat(model="llama3:8b", messages=[{"role": "user", "content": prompt}])
-                    return response['message']['content']
-
-                if not filtered_data.empty:
-                    data_summary = filtered_data.describe().to_string()
-                    full_prompt = f"{prompt}\n\nData Summary:\n{data_summary}"
-                else:
-                    full_prompt = prompt
-
-                ai_response = get_ai_response(full_prompt)
-                st.write("### AI Response")
-                st.write(ai_response)
-            except Exception as e:
-                st.error(f"Error fetching AI response: {e}")
+            filtered_data = load_data(generation, selected_series_id, start_date, end_date, float32_values)
+            st.session_state["description_memory"] = dashboard_data.memory_report(filtered_data)
+            if not filtered_data.empty:
+                data_summary = dashboard_data.describe_series(filtered_data, start_date, end_date)
+                full_prompt = f"{prompt}\n\nData Summary:\n{data_summary}"
+            else:
+                data_summary = ""
+                full_prompt = prompt
+            cache_key = ai_jobs.response_cache_key(ai_jobs.DEFAULT_MODEL, prompt, data_summary)
+            replace_job("description_job", ai_jobs.start_chat(description_key, full_prompt, cache_key=cache_key))
+        if "description_job" in st.session_state:
+            st.caption(f"Data frame memory: {st.session_state['description_memory']}")
+        render_job("description_job", "AI Response")
+
+        st.caption(ai_jobs.format_cache_stats())
+        with st.expander("AI call latency"):
+            latencies = ai_jobs.latency_table()
+            if latencies:
+                st.dataframe(pd.DataFrame([
+                    {"model": model, "metric": metric, "calls": calls, "mean (s)": round(mean, 2), **buckets}
+                    for model, metric, calls, mean, buckets in latencies
+                ]), hide_index=True)
+            else:
+                st.caption("No completed AI calls yet.")
 
     except Exception as e:
         st.error(f"Error loading data: {e}")
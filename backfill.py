@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import json_decoding
+from data_ingestion import (
+    build_combinations,
+    create_client,
+    get_load_mode,
+    load_chunk,
+    load_config,
+    resolve_timestamps,
+    wait_for_db,
+)
+from db import DB_SETTINGS, ConnectionPool, create_pool
+from ingestion_state import bump_load_generation, save_watermark
+from schema import migrate
+from smard_cache import create_cache
+
+# Per-process state of a backfill worker, set up by _init_worker.
+_worker = {}
+
+def load_checkpoints(conn):
+    """Return the set of (filter_id, region, resolution, chunk_timestamp) units already backfilled."""
+    cur = conn.cursor()
+    cur.execute("SELECT filter_id, region, resolution, chunk_timestamp FROM backfill_checkpoint;")
+    completed = {tuple(row) for row in cur.fetchall()}
+    cur.close()
+    return completed
+
+def save_checkpoint(conn, key, row_count):
+    """Mark one work unit as completed."""
+    filter_id, region, resolution, chunk_timestamp = key
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT INTO backfill_checkpoint (filter_id, region, resolution, chunk_timestamp, row_count)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (filter_id, region, resolution, chunk_timestamp)
+        DO UPDATE SET row_count = EXCLUDED.row_count, completed_at = now();
+        """,
+        (filter_id, region, resolution, chunk_timestamp, row_count)
+    )
+    conn.commit()
+    cur.close()
+
+async def plan_units(config, completed):
+    """
+    Build the backfill work plan: one (filter_label, filter_id, region,
+    resolution, chunk_timestamp, is_open) unit per chunk not yet checkpointed.
+    The open latest chunk of each series is always replanned.
+    """
+    cache = create_cache(config)
+    try:
+        async with create_client(config, cache=cache) as client:
+            resolved = await resolve_timestamps(client, build_combinations(config))
+    finally:
+        if cache is not None:
+            cache.close()
+
+    units = []
+    for (filter_label, filter_id, region, resolution), timestamps in resolved:
+        latest = timestamps[-1]
+        for ts in timestamps:
+            if ts != latest and (filter_id, region, resolution, ts) in completed:
+                continue
+            units.append((filter_label, filter_id, region, resolution, ts, ts == latest))
+    return resolved, units
+
+def _init_worker(config, workers):
+    """Give each worker process its own DB connection, HTTP settings and cache handle."""
+    json_decoding.configure(config.get("JSON_DECODER", "auto"))
+    _worker["config"] = config
+    _worker["pool"] = ConnectionPool(maxconn=1, **DB_SETTINGS)
+    _worker["load_mode"] = get_load_mode(config)
+    _worker["cache"] = create_cache(config)
+    # The per-host rate limit is shared out between the worker processes.
+    _worker["rate_limit"] = float(config.get("FETCH_RATE_LIMIT", 10)) / workers
+
+async def _fetch_batch(units):
+    config = _worker["config"]
+    client = create_client(
+        config,
+        cache=_worker["cache"],
+        concurrency=int(config.get("BACKFILL_FETCH_CONCURRENCY", 4)),
+        rate_limit=_worker["rate_limit"],
+    )
+    async with client:
+        return await asyncio.gather(*(
+            client.fetch_chunk(filter_id, region, resolution, ts, is_open=is_open)
+            for _, filter_id, region, resolution, ts, is_open in units
+        ), return_exceptions=True)
+
+def _run_batch(units):
+    """Fetch and load one batch of units in a worker process; returns (chunks_done, rows)."""
+    db_pool = _worker["pool"]
+    chunks_done = 0
+    rows = 0
+    for unit, chunk in zip(units, asyncio.run(_fetch_batch(units))):
+        filter_label, filter_id, region, resolution, ts, _ = unit
+        if chunk is None or isinstance(chunk, BaseException):
+            print(f"Failed to fetch timestamp {ts} for combination {filter_label} ({filter_id}), {region}, {resolution}: {chunk}")
+            continue
+        try:
+            row_count = load_chunk(chunk, filter_label, filter_id, region, resolution, ts, db_pool, _worker["load_mode"])
+            with db_pool.connection() as conn:
+                save_checkpoint(conn, (filter_id, region, resolution, ts), row_count)
+        except Exception as e:
+            print(f"Failed to load chunk {ts} for combination {filter_label} ({filter_id}), {region}, {resolution}: {e}")
+            continue
+        chunks_done += 1
+        rows += row_count
+    return chunks_done, rows
+
+def advance_watermarks(conn, resolved):
+    """
+    Seed the incremental-mode watermark of every series whose closed chunks
+    are all checkpointed, so a later incremental run starts after the backfill.
+    """
+    completed = load_checkpoints(conn)
+    for (_, filter_id, region, resolution), timestamps in resolved:
+        closed = timestamps[:-1]
+        if closed and all((filter_id, region, resolution, ts) in completed for ts in closed):
+            save_watermark(conn, (filter_id, region, resolution), closed[-1], None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel, resumable backfill of all SMARD chunks.")
+    parser.add_argument("--config", default="config.yaml", help="Path to the YAML configuration.")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: BACKFILL_WORKERS or CPU count).")
+    parser.add_argument("--restart", action="store_true", help="Discard checkpoints and backfill everything again.")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if not build_combinations(config):
+        print("Missing configuration values in config.yaml.")
+        return
+    workers = args.workers or int(config.get("BACKFILL_WORKERS", os.cpu_count() or 2))
+    batch_size = int(config.get("BACKFILL_BATCH_SIZE", 8))
+
+    # The coordinator only needs the database for setup and checkpoints; its
+    # connections are closed before the worker processes are forked.
+    db_pool = create_pool(config)
+    try:
+        if not wait_for_db(db_pool):
+            return
+        with db_pool.connection() as conn:
+            migrate(conn)
+            if args.restart:
+                cur = conn.cursor()
+                cur.execute("TRUNCATE backfill_checkpoint;")
+                conn.commit()
+                cur.close()
+            completed = load_checkpoints(conn)
+    finally:
+        db_pool.closeall()
+
+    resolved, units = asyncio.run(plan_units(config, completed))
+    batches = [units[i:i + batch_size] for i in range(0, len(units), batch_size)]
+    print(f"Backfill plan: {len(units)} chunks in {len(batches)} batches ({len(completed)} already checkpointed), {workers} workers.")
+
+    start = time.perf_counter()
+    chunks_done = 0
+    rows = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config, workers)) as executor:
+        futures = [executor.submit(_run_batch, batch) for batch in batches]
+        for future in as_completed(futures):
+            batch_chunks, batch_rows = future.result()
+            chunks_done += batch_chunks
+            rows += batch_rows
+            elapsed = max(time.perf_counter() - start, 1e-9)
+            print(
+                f"Backfill progress: {chunks_done}/{len(units)} chunks, {rows} rows, "
+                f"{rows / elapsed:.0f} rows/s, {chunks_done / elapsed:.2f} chunks/s."
+            )
+
+    elapsed = time.perf_counter() - start
+    print(f"Backfill finished: {chunks_done}/{len(units)} chunks and {rows} rows in {elapsed:.1f}s.")
+
+    db_pool = create_pool(config)
+    try:
+        with db_pool.connection() as conn:
+            advance_watermarks(conn, resolved)
+            if rows:
+                bump_load_generation(conn)
+    finally:
+        db_pool.closeall()
+
+if __name__ == "__main__":
+    main()
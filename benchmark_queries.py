@@ -0,0 +1,244 @@
+import argparse
+import datetime
+import statistics
+import time
+
+import pandas as pd
+
+import dashboard_data
+import export
+import partitions
+from schema import MIGRATIONS, migrate
+
+# Scratch schema holding the synthetic data; dropped afterwards unless --keep.
+BENCHMARK_SCHEMA = "benchmark"
+QUARTER_HOUR_MS = 15 * 60 * 1000
+# Minimum chart points, as in the dashboard (700 px wide, 2 px per point).
+CHART_MIN_POINTS = 350
+
+def load_synthetic_data(conn, series, days):
+    """
+    Fill the fact table with `series` quarter-hour series covering `days`
+    days, inserted time-major like the ETL's chunk-by-chunk loads.
+    """
+    end = dashboard_data.date_to_ms(datetime.date(2025, 1, 1))
+    start = end - days * 24 * 60 * 60 * 1000
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT to_regclass('energy_facts') IS NOT NULL,
+               to_regprocedure('ensure_energy_facts_partitions(bigint, bigint)') IS NOT NULL;
+    """)
+    normalized, partitioned = cur.fetchone()
+    if normalized:
+        # Normalized schema (version 7+): series dimension plus fact table.
+        if partitioned:
+            partitions.ensure_partitions(conn, start, end - QUARTER_HOUR_MS)
+        cur.execute(
+            """
+            INSERT INTO series (filter_id, label, region, resolution)
+            SELECT 1000 + s, 'Synthetic series ' || s, 'DE', 'quarterhour' FROM generate_series(1, %s) AS s;
+            INSERT INTO energy_facts (timestamp, value, series_id)
+            SELECT t, random() * 10000, series_id
+            FROM generate_series(%s::bigint, %s::bigint, %s::bigint) AS t, series;
+            """,
+            (series, start, end - QUARTER_HOUR_MS, QUARTER_HOUR_MS)
+        )
+    else:
+        cur.execute(
+            """
+            INSERT INTO energy_timeseries (filter_label, filter_id, region, resolution, timestamp, value)
+            SELECT 'Synthetic series ' || s, 1000 + s, 'DE', 'quarterhour', t, random() * 10000
+            FROM generate_series(%s::bigint, %s::bigint, %s::bigint) AS t, generate_series(1, %s) AS s;
+            """,
+            (start, end - QUARTER_HOUR_MS, QUARTER_HOUR_MS, series)
+        )
+    conn.commit()
+    cur.close()
+    vacuum_analyze(conn)
+    return start, end
+
+def vacuum_analyze(conn):
+    """
+    VACUUM ANALYZE the tables of the current (benchmark) schema so plans, sizes
+    and index-only scans reflect the loaded data. Partitions are covered
+    through their parent table.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT string_agg(format('%I', c.relname), ', ')
+        FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p') AND NOT c.relispartition;
+    """)
+    tables = cur.fetchone()[0]
+    conn.commit()
+    if tables:
+        conn.autocommit = True
+        cur.execute(f"VACUUM ANALYZE {tables};")
+        conn.autocommit = False
+    cur.close()
+
+def relation_sizes(conn):
+    """Return (table bytes, index bytes) of all tables in the current schema."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT COALESCE(SUM(pg_table_size(c.oid)), 0), COALESCE(SUM(pg_indexes_size(c.oid)), 0)
+        FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p');
+    """)
+    sizes = cur.fetchone()
+    cur.close()
+    return sizes
+
+def dashboard_queries(conn, end):
+    """
+    The dashboard's access paths in the current schema version as (name,
+    callable(conn)) pairs; call again after migrating. From version 7 on they
+    query energy_facts by series_id, and from version 9 the chart goes
+    through the dashboard's own rollup loader. Older versions query the
+    energy_timeseries table by filter_id, region and resolution.
+    """
+    end_date = pd.to_datetime(end - 1, unit="ms").date()
+    year_start_date = end_date - datetime.timedelta(days=364)
+    year_start = dashboard_data.date_to_ms(year_start_date)
+    month_start = dashboard_data.date_to_ms(end_date - datetime.timedelta(days=30))
+    series = (1001, "DE", "quarterhour")
+
+    def query(sql, params=()):
+        def run(conn):
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            cur.fetchall()
+            cur.close()
+        return run
+
+    cur = conn.cursor()
+    cur.execute("SELECT to_regclass('energy_facts') IS NOT NULL, to_regclass('energy_rollups') IS NOT NULL;")
+    normalized, rollups = cur.fetchone()
+    cur.close()
+    if not normalized:
+        one_series_year = query(
+            """
+            SELECT timestamp, value FROM energy_timeseries
+            WHERE filter_id = %s AND region = %s AND resolution = %s AND timestamp >= %s AND timestamp < %s
+            ORDER BY timestamp;
+            """,
+            series + (year_start, end)
+        )
+        return [
+            ("series bounds", query(
+                """
+                SELECT MIN(timestamp), MAX(timestamp) FROM energy_timeseries
+                WHERE filter_id = %s AND region = %s AND resolution = %s;
+                """,
+                series
+            )),
+            ("one series, last year", one_series_year),
+            ("chart, last year", one_series_year),
+            ("all series, last month", query(
+                "SELECT filter_id, timestamp, value FROM energy_timeseries WHERE timestamp >= %s AND timestamp < %s;",
+                (month_start, end)
+            )),
+            ("full scan aggregate", query("SELECT COUNT(*), AVG(value) FROM energy_timeseries;")),
+        ]
+
+    series_id = export.find_series_id(conn, *series)
+    conn.commit()
+    one_series_year = query(
+        """
+        SELECT timestamp, value FROM energy_facts
+        WHERE series_id = %s AND timestamp >= %s AND timestamp < %s
+        ORDER BY timestamp;
+        """,
+        (series_id, year_start, end)
+    )
+    if rollups:
+        def chart(conn):
+            dashboard_data.load_chart_data(conn, series_id, series[2], year_start_date, end_date, CHART_MIN_POINTS)
+            conn.commit()
+    else:
+        chart = one_series_year
+    return [
+        ("series bounds", query(
+            "SELECT MIN(timestamp), MAX(timestamp) FROM energy_facts WHERE series_id = %s;",
+            (series_id,)
+        )),
+        ("one series, last year", one_series_year),
+        ("chart, last year", chart),
+        ("all series, last month", query(
+            "SELECT series_id, timestamp, value FROM energy_facts WHERE timestamp >= %s AND timestamp < %s;",
+            (month_start, end)
+        )),
+        ("full scan aggregate", query("SELECT COUNT(*), AVG(value) FROM energy_facts;")),
+    ]
+
+def time_queries(conn, queries, repeat):
+    """Return the median wall time in milliseconds of each query."""
+    timings = {}
+    for name, query in queries:
+        query(conn)  # warm-up
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query(conn)
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[name] = statistics.median(samples)
+    return timings
+
+def print_report(title, before, after, sizes_before, sizes_after, rows):
+    print(title)
+    print(f"{'query':<28}{'before':>14}{'after':>14}{'speedup':>10}")
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<28}{before[name]:>12.1f}ms{after[name]:>12.1f}ms{speedup:>9.1f}x")
+    for label, size_before, size_after in zip(("table size", "index size"), sizes_before, sizes_after):
+        mib = 1024 * 1024
+        print(
+            f"{label:<28}{size_before / mib:>11.1f}MiB{size_after / mib:>11.1f}MiB"
+            f"{size_after / size_before if size_before else 0:>9.2f}x"
+            f"   ({size_before / rows:.1f} -> {size_after / rows:.1f} bytes/row)"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard queries and storage before and after a schema migration.")
+    parser.add_argument("--migration", type=int, default=MIGRATIONS[-1][0], help="Migration version to measure (default: latest).")
+    parser.add_argument("--series", type=int, default=15, help="Number of synthetic series.")
+    parser.add_argument("--days", type=int, default=4 * 365, help="Days of quarter-hour history per series.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query (median reported).")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {BENCHMARK_SCHEMA} schema afterwards.")
+    args = parser.parse_args()
+
+    version = args.migration
+    conn = dashboard_data.connect()
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE; CREATE SCHEMA {BENCHMARK_SCHEMA};")
+    cur.execute(f"SET search_path TO {BENCHMARK_SCHEMA};")
+    conn.commit()
+    cur.close()
+    try:
+        migrate(conn, target_version=version - 1)
+        rows = args.series * args.days * 24 * 4
+        print(f"Loading {rows} synthetic rows ({args.series} series x {args.days} days)...")
+        _, end = load_synthetic_data(conn, args.series, args.days)
+        before = time_queries(conn, dashboard_queries(conn, end), args.repeat)
+        sizes_before = relation_sizes(conn)
+
+        migrate(conn, target_version=version)
+        vacuum_analyze(conn)
+        after = time_queries(conn, dashboard_queries(conn, end), args.repeat)
+        sizes_after = relation_sizes(conn)
+        description = next(description for number, description, _ in MIGRATIONS if number == version)
+        print_report(
+            f"Schema version {version - 1} -> {version} ({description}):",
+            before, after, sizes_before, sizes_after, rows
+        )
+    finally:
+        if not args.keep:
+            conn.rollback()
+            cur = conn.cursor()
+            cur.execute(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE;")
+            conn.commit()
+            cur.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+from db import DB_SETTINGS
+
+# Rows fetched per round trip by the server-side cursors of read_frame.
+FETCH_SIZE = 20_000
+
+# Descriptive columns of a series, repeated on every row of load_series_data.
+DIMENSION_COLUMNS = ("filter_label", "filter_id", "region", "resolution")
+
+HOUR_MS = 60 * 60 * 1000
+DAY_MS = 24 * HOUR_MS
+
+# Rollup granularities in energy_rollups, coarsest first, with their nominal bucket length.
+ROLLUP_GRANULARITIES = (
+    ("month", 30 * DAY_MS),
+    ("week", 7 * DAY_MS),
+    ("day", DAY_MS),
+    ("hour", HOUR_MS),
+)
+
+# Nominal spacing of the raw data points of each SMARD resolution.
+RESOLUTION_MS = {
+    "quarterhour": HOUR_MS // 4,
+    "hour": HOUR_MS,
+    "day": DAY_MS,
+    "week": 7 * DAY_MS,
+    "month": 30 * DAY_MS,
+    "year": 365 * DAY_MS,
+}
+
+def connect():
+    """Open a connection to the energy database."""
+    return psycopg2.connect(**DB_SETTINGS)
+
+def date_to_ms(date):
+    """Convert a date (midnight UTC) to a SMARD millisecond timestamp."""
+    return int(pd.Timestamp(date).value // 1_000_000)
+
+def date_range_ms(start_date, end_date):
+    """Return the [start, end) millisecond range covering start_date to end_date inclusive."""
+    return date_to_ms(start_date), date_to_ms(end_date + datetime.timedelta(days=1))
+
+def read_frame(conn, query, params, columns, int_columns=("timestamp",), fetch_size=None):
+    """
+    Run a query returning numeric columns through a named server-side cursor
+    and build the DataFrame from float64 NumPy blocks of fetch_size rows, so
+    neither psycopg2 nor pandas ever holds the whole result as Python rows.
+    NULLs become NaN; int_columns are converted to int64 at the end. Peak
+    memory is about twice the final frame plus one block.
+    """
+    fetch_size = fetch_size or FETCH_SIZE
+    cur = conn.cursor(name="dashboard_read")
+    cur.itersize = fetch_size
+    try:
+        cur.execute(query, params)
+        blocks = []
+        while True:
+            rows = cur.fetchmany(fetch_size)
+            if not rows:
+                break
+            blocks.append(np.array(rows, dtype=np.float64))
+    finally:
+        cur.close()
+        conn.commit()
+    data = np.concatenate(blocks) if blocks else np.empty((0, len(columns)))
+    del blocks
+    return pd.DataFrame({
+        column: data[:, i].astype(np.int64 if column in int_columns else np.float64)
+        for i, column in enumerate(columns)
+    })
+
+def load_generation(conn):
+    """Return the ETL load generation; it changes whenever new data has been loaded."""
+    cur = conn.cursor()
+    cur.execute("SELECT generation FROM load_generation;")
+    row = cur.fetchone()
+    cur.close()
+    return row[0] if row else 0
+
+def load_series_options(conn):
+    """
+    List the available (series_id, filter_label, filter_id, region, resolution)
+    series from the small series dimension table, skipping series without data.
+    """
+    return pd.read_sql_query(
+        """
+        SELECT series_id, label AS filter_label, filter_id, region, resolution
+        FROM series s
+        WHERE EXISTS (SELECT 1 FROM energy_facts f WHERE f.series_id = s.series_id)
+        ORDER BY filter_label, region, resolution;
+        """,
+        conn,
+    )
+
+def load_series_bounds(conn, series_id):
+    """Return the (min, max) timestamp in milliseconds of one series, or (None, None)."""
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT MIN(timestamp), MAX(timestamp) FROM energy_facts WHERE series_id = %s;",
+        (series_id,)
+    )
+    bounds = cur.fetchone()
+    cur.close()
+    return bounds
+
+def load_series_data(conn, series_id, start_date, end_date, float32=False):
+    """
+    Load one series between start_date and end_date (both inclusive) with the
+    filtering done by PostgreSQL, as a compact frame: a sorted 'datetime'
+    index, categorical filter_label, filter_id, region and resolution columns
+    taken from the series dimension row, and 'value' as float64 (or float32).
+    """
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT label, filter_id, region, resolution FROM series WHERE series_id = %s;",
+        (series_id,)
+    )
+    dimensions = dict(zip(DIMENSION_COLUMNS, cur.fetchone()))
+    cur.close()
+    df = read_frame(
+        conn,
+        """
+        SELECT timestamp, value
+        FROM energy_facts
+        WHERE series_id = %s AND timestamp >= %s AND timestamp < %s
+        ORDER BY timestamp;
+        """,
+        (series_id, *date_range_ms(start_date, end_date)),
+        ["timestamp", "value"],
+    )
+    # One category per column, so each dimension costs a single int8 code per row.
+    codes = np.zeros(len(df), dtype=np.int8)
+    columns = {column: pd.Categorical.from_codes(codes, [value]) for column, value in dimensions.items()}
+    columns["value"] = df["value"].to_numpy(dtype=np.float32 if float32 else np.float64)
+    index = pd.DatetimeIndex(pd.to_datetime(df["timestamp"], unit="ms"), name="datetime")
+    return pd.DataFrame(columns, index=index)
+
+def memory_report(df):
+    """
+    Describe the memory footprint of a load_series_data frame in bytes per
+    row, next to the same data in the old layout: object-dtype dimension
+    columns, int64 'timestamp', float64 'value' and a 'datetime' column.
+    """
+    if df.empty:
+        return "0 rows."
+    rows = len(df)
+    compact_bytes = df.memory_usage(deep=True).sum()
+    old_layout = pd.DataFrame({
+        **{column: df[column].astype(object if column != "filter_id" else np.int64) for column in DIMENSION_COLUMNS},
+        "timestamp": df.index.as_unit("ms").asi8,
+        "value": df["value"].astype(np.float64),
+        "datetime": df.index.to_numpy(),
+    })
+    old_bytes = old_layout.memory_usage(deep=True).sum()
+    return (
+        f"{len(df)} rows: {compact_bytes / rows:.1f} bytes/row "
+        f"(was {old_bytes / rows:.1f} bytes/row with object columns, {old_bytes / compact_bytes:.1f}x)."
+    )
+
+def describe_series(df, start_date, end_date):
+    """
+    Summarize a non-empty load_series_data frame for an AI prompt: the series
+    dimensions, the selected and covered time span, and statistics of 'value'.
+    """
+    label, filter_id, region, resolution = (df[column].cat.categories[0] for column in DIMENSION_COLUMNS)
+    return (
+        f"Series: {label} (filter {filter_id}), region {region}, resolution {resolution}\n"
+        f"Selected range: {start_date} to {end_date}; {len(df)} rows from {df.index.min()} to {df.index.max()} (UTC)\n"
+        f"{df['value'].describe().to_string()}"
+    )
+
+def choose_granularity(resolution, start_ms, end_ms, min_points):
+    """
+    Return the coarsest rollup granularity that still yields at least
+    min_points buckets between start_ms and end_ms, or None for raw rows.
+    Rollups no coarser than the series resolution are never chosen.
+    """
+    resolution_ms = RESOLUTION_MS.get(resolution, 0)
+    for granularity, bucket_ms in ROLLUP_GRANULARITIES:
+        if bucket_ms > resolution_ms and (end_ms - start_ms) / bucket_ms >= min_points:
+            return granularity
+    return None
+
+def load_chart_data(conn, series_id, resolution, start_date, end_date, min_points):
+    """
+    Load the points to plot for one series between start_date and end_date
+    (both inclusive): the coarsest rollup with at least min_points buckets,
+    falling back to the raw rows. Returns (granularity or None, DataFrame)
+    with 'timestamp', 'value' and 'datetime' columns; for a rollup 'value'
+    is the bucket mean and 'min_value', 'max_value' and 'value_count' are added.
+    """
+    start_ms, end_ms = date_range_ms(start_date, end_date)
+    granularity = choose_granularity(resolution, start_ms, end_ms, min_points)
+    if granularity is None:
+        df = read_frame(
+            conn,
+            """
+            SELECT timestamp, value
+            FROM energy_facts
+            WHERE series_id = %s AND timestamp >= %s AND timestamp < %s
+            ORDER BY timestamp;
+            """,
+            (series_id, start_ms, end_ms),
+            ["timestamp", "value"],
+        )
+    else:
+        # Buckets overlapping the start of the range are included.
+        df = read_frame(
+            conn,
+            """
+            SELECT bucket_start AS timestamp, sum_value / NULLIF(value_count, 0) AS value,
+                   min_value, max_value, value_count
+            FROM energy_rollups
+            WHERE series_id = %s AND granularity = %s
+              AND bucket_start >= (EXTRACT(EPOCH FROM date_trunc(%s, to_timestamp(%s / 1000.0) AT TIME ZONE 'UTC')) * 1000)::BIGINT
+              AND bucket_start < %s
+            ORDER BY bucket_start;
+            """,
+            (series_id, granularity, granularity, start_ms, end_ms),
+            ["timestamp", "value", "min_value", "max_value", "value_count"],
+            int_columns=("timestamp", "value_count"),
+        )
+    df["datetime"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return granularity, df
+
+def count_series_rows(conn, series_id, start_date, end_date):
+    """Count the rows of one series between start_date and end_date (both inclusive)."""
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT COUNT(*) FROM energy_facts WHERE series_id = %s AND timestamp >= %s AND timestamp < %s;",
+        (series_id, *date_range_ms(start_date, end_date))
+    )
+    count = cur.fetchone()[0]
+    cur.close()
+    return count
+
+def load_series_page(conn, series_id, start_date, end_date, after_timestamp=None, page_size=100):
+    """
+    Load one page of a series between start_date and end_date (both inclusive)
+    by keyset pagination on (series_id, timestamp): the first page_size rows
+    after after_timestamp, or from the start of the range when it is None.
+    Returns a DataFrame with 'timestamp', 'datetime' and 'value' columns.
+    """
+    start_ms, end_ms = date_range_ms(start_date, end_date)
+    if after_timestamp is not None:
+        start_ms = max(start_ms, after_timestamp + 1)
+    df = read_frame(
+        conn,
+        """
+        SELECT timestamp, value
+        FROM energy_facts
+        WHERE series_id = %s AND timestamp >= %s AND timestamp < %s
+        ORDER BY timestamp
+        LIMIT %s;
+        """,
+        (series_id, start_ms, end_ms, page_size),
+        ["timestamp", "value"],
+    )
+    df.insert(1, "datetime", pd.to_datetime(df["timestamp"], unit="ms"))
+    return df
@@ -1,23 +1,61 @@
+import asyncio
+import io
+import math
+import struct
 import yaml
-import requests
+import aiohttp
+import numpy as np
 import psycopg2
 import time
 
+import json_decoding
+from db import create_pool
+from ingestion_state import ChunkStateStore, WatermarkTracker, bump_load_generation, load_watermarks, save_watermark
+from partitions import ensure_partitions
+from schema import migrate
+from smard_cache import create_cache
+from smard_client import SMARD_BASE_URL, SmardClient
+
+# Supported strategies for loading a prepared chunk into energy_facts.
+# "copy" streams rows into a staging table and merges them with one UPSERT;
+# "row" is the original statement-per-row fallback.
+LOAD_MODES = ("copy", "row")
+
+# PostgreSQL binary COPY framing for (BIGINT, FLOAT) staging rows.
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_COPY_TRAILER = struct.pack("!h", -1)
+_COPY_RECORD = np.dtype([
+    ("field_count", ">i2"),
+    ("timestamp_length", ">i4"),
+    ("timestamp", ">i8"),
+    ("value_length", ">i4"),
+    ("value", ">f8"),
+])
+
 def load_config(config_file="config.yaml"):
     """Load configuration from a YAML file."""
     with open(config_file, "r") as file:
         config = yaml.safe_load(file)
     return config
 
-def wait_for_db(host, database, user, password, retries=10, delay=5):
+def get_load_mode(config):
+    """Return the configured LOAD_MODE ("copy" or "row"), defaulting to copy."""
+    load_mode = config.get("LOAD_MODE", "copy")
+    if load_mode not in LOAD_MODES:
+        print(f"Unknown LOAD_MODE '{load_mode}', defaulting to copy.")
+        load_mode = "copy"
+    return load_mode
+
+def wait_for_db(db_pool, retries=10, delay=5):
     """
     Wait for the database to become available.
-    Retries the connection for a given number of times with a delay.
+    Retries the connection for a given number of times with a delay; the first
+    successful connection is kept in the pool for the loader to reuse.
     """
     for attempt in range(1, retries + 1):
         try:
-            conn = psycopg2.connect(host=host, database=database, user=user, password=password)
-            conn.close()
+            conn = db_pool.getconn()
+            db_pool.putconn(conn)
             return True
         except psycopg2.OperationalError as e:
             print(f"Database not ready (attempt {attempt}/{retries}). Retrying in {delay} seconds...")
@@ -25,95 +63,341 @@ def wait_for_db(host, database, user, password, retries=10, delay=5):
     print("Failed to connect to the database after several attempts.")
     return False
 
-def fetch_timestamps(filter_id, region, resolution):
-    """Fetch available timestamps from the SMARD API using the numeric filter id."""
-    timestamp_url = f"https://smard.api.proxy.bund.dev/app/chart_data/{filter_id}/{region}/index_{resolution}.json"
-    print(f"Requesting timestamps from: {timestamp_url}")
-    try:
-        response = requests.get(timestamp_url, timeout=60)
-        response.raise_for_status()
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP error occurred while fetching timestamps for filter {filter_id}, region {region}, resolution {resolution}: {e}")
-        return []  # Return an empty list so processing can continue.
-    data = response.json()
-    return data if isinstance(data, list) else data.get("timestamps", [])
-
-def fetch_timeseries(filter_id, region, resolution, timestamp):
-    """Fetch time series data from the SMARD API using a timestamp."""
-    timeseries_url = (
-        f"hhttps://smard.api.proxy.bund.dev/app/chart_data/{filter_id}/{region}/"
-        f"{filter_id}_{region}_{resolution}_{timestamp}.json"
-    )
-    print(f"Requesting time series data from: {timeseries_url}")
+def prepare_data(raw_data):
+    """
+    Prepare raw data into columnar arrays: int64 timestamps and float64 values
+    (NaN for nulls). Each raw data entry is expected to be a list/tuple with at
+    least two elements; malformed entries are dropped and reported in aggregate.
+    """
     try:
-        response = requests.get(timeseries_url, timeout=60)
-        response.raise_for_status()
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP error occurred while fetching time series for filter {filter_id}, region {region}, resolution {resolution}, timestamp {timestamp}: {e}")
-        return []  # Return an empty list to indicate no data.
-    data = response.json()
-    return data if isinstance(data, list) else data.get("series", [])
-
-def prepare_data(raw_data) -> list:
-    """
-    Prepare raw data into a list of dictionaries with keys 'timestamp' and 'value'.
-    Each raw data entry is expected to be a list/tuple with at least two elements.
-    """
-    prepared_data = []
-    for raw_data_pair in raw_data:
-        if isinstance(raw_data_pair, (list, tuple)) and len(raw_data_pair) >= 2:
-            prepared_data.append({
-                "timestamp": raw_data_pair[0],
-                "value": raw_data_pair[1]
-            })
-        else:
-            print("Unexpected data format:", raw_data_pair)
-    print(f"Prepared {len(prepared_data)} data entries for insertion.")
-    return prepared_data
-
-def insert_data_into_db(timeseries_data, filter_label, filter_id, region, resolution):
-    """Upsert time series data into a PostgreSQL database with composite keys."""
-    conn = psycopg2.connect(
-        host="db",           # Docker Compose service name for the database
-        database="energydata",
-        user="user",
-        password="password"
+        # Fast path: one vectorized conversion of the whole [[timestamp, value], ...] payload.
+        array = np.asarray(raw_data, dtype=np.float64)
+        malformed = 0
+        if array.ndim != 2 or array.shape[1] < 2:
+            raise ValueError("unexpected shape")
+    except (ValueError, TypeError):
+        valid = [
+            pair[:2] for pair in raw_data
+            if isinstance(pair, (list, tuple)) and len(pair) >= 2
+            and isinstance(pair[0], (int, float)) and (pair[1] is None or isinstance(pair[1], (int, float)))
+        ]
+        malformed = len(raw_data) - len(valid)
+        array = np.asarray(valid, dtype=np.float64).reshape(-1, 2)
+
+    # Rows without a timestamp cannot be keyed.
+    keyed = ~np.isnan(array[:, 0])
+    malformed += int(np.count_nonzero(~keyed))
+    timestamps = array[keyed, 0].astype(np.int64)
+    values = array[keyed, 1]
+    if malformed:
+        print(f"Dropped {malformed} entries with unexpected data format.")
+    print(f"Prepared {len(timestamps)} data entries for insertion.")
+    return timestamps, values
+
+# Per-process cache of series_id by (filter_id, region, resolution) -> (series_id, label).
+_series_ids = {}
+
+def get_series_id(cur, filter_label, filter_id, region, resolution):
+    """Return the series dimension id of a combination, creating or relabelling it as needed."""
+    key = (filter_id, region, resolution)
+    cached = _series_ids.get(key)
+    if cached is not None and cached[1] == filter_label:
+        return cached[0]
+    cur.execute(
+        """
+        INSERT INTO series (filter_id, label, region, resolution)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (filter_id, region, resolution) DO UPDATE SET label = EXCLUDED.label
+        RETURNING series_id;
+        """,
+        (filter_id, filter_label, region, resolution)
     )
+    series_id = cur.fetchone()[0]
+    # Commit the dimension row on its own so the cached id stays valid even
+    # if the chunk load that follows is rolled back.
+    cur.connection.commit()
+    _series_ids[key] = (series_id, filter_label)
+    return series_id
+
+def insert_data_into_db(timeseries_data, filter_label, filter_id, region, resolution, db_pool, mode="copy"):
+    """
+    Upsert time series data into a PostgreSQL database with composite keys.
+    timeseries_data is the (timestamps, values) pair returned by prepare_data.
+    Rows whose value is unchanged are skipped; returns the number of rows written.
+    The connection is checked out of db_pool and returned afterwards.
+    mode selects the load strategy: "copy" (bulk, default) or "row" (fallback).
+    """
+    with db_pool.connection() as conn:
+        return _insert_chunk(conn, timeseries_data, filter_label, filter_id, region, resolution, mode)
+
+def _insert_chunk(conn, timeseries_data, filter_label, filter_id, region, resolution, mode):
+    # The schema is created once at startup by schema.migrate().
+    timestamps = timeseries_data[0]
+    if len(timestamps):
+        ensure_partitions(conn, int(timestamps.min()), int(timestamps.max()))
     cur = conn.cursor()
+    series_id = get_series_id(cur, filter_label, filter_id, region, resolution)
+
+    if mode == "row":
+        inserted_count = _upsert_rows(cur, timeseries_data, series_id)
+    else:
+        inserted_count = _copy_rows(cur, timeseries_data, series_id)
+
+    if inserted_count:
+        # Keep the hourly/daily/weekly/monthly rollups in step with the facts.
+        cur.execute(
+            "SELECT refresh_energy_rollups(%s, %s, %s);",
+            (series_id, int(timestamps.min()), int(timestamps.max()))
+        )
 
-    # Create table if it doesn't exist with a composite UNIQUE constraint.
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS energy_timeseries (
-            id SERIAL PRIMARY KEY,
-            filter_label TEXT,
-            filter_id INTEGER,
-            region TEXT,
-            resolution TEXT,
-            timestamp BIGINT,
-            value FLOAT,
-            UNIQUE (filter_id, region, resolution, timestamp)
-        );
-    """)
     conn.commit()
+    cur.close()
+    print(f"Upserted {inserted_count} changed of {len(timeseries_data[0])} records for combination {filter_label} ({filter_id}), {region}, {resolution}.")
+    return inserted_count
 
+def _upsert_rows(cur, timeseries_data, series_id):
+    """Fallback load path: one INSERT ... ON CONFLICT round trip per data point."""
+    timestamps, values = timeseries_data
     inserted_count = 0
     # Use an UPSERT statement: insert new row or update the value if conflict occurs.
-    for entry in timeseries_data:
+    for timestamp, value in zip(timestamps.tolist(), values.tolist()):
         cur.execute(
             """
-            INSERT INTO energy_timeseries (filter_label, filter_id, region, resolution, timestamp, value)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON CONFLICT (filter_id, region, resolution, timestamp)
-            DO UPDATE SET value = EXCLUDED.value, filter_label = EXCLUDED.filter_label;
+            INSERT INTO energy_facts (series_id, timestamp, value)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (series_id, timestamp)
+            DO UPDATE SET value = EXCLUDED.value
+            WHERE energy_facts.value IS DISTINCT FROM EXCLUDED.value;
             """,
-            (filter_label, filter_id, region, resolution, entry["timestamp"], entry["value"])
+            (series_id, timestamp, None if math.isnan(value) else value)
         )
-        inserted_count += 1
+        inserted_count += cur.rowcount
+    return inserted_count
 
-    conn.commit()
-    cur.close()
-    conn.close()
-    print(f"Upserted {inserted_count} records for combination {filter_label} ({filter_id}), {region}, {resolution}.")
+def _copy_rows(cur, timeseries_data, series_id):
+    """
+    Bulk load path: stream the chunk into a temporary staging table with COPY
+    and merge it into energy_facts with a single set-based UPSERT.
+    """
+    timestamps, values = timeseries_data
+    # Deduplicate on timestamp so the merge never touches the same row twice;
+    # the last value wins, matching the row-by-row path.
+    unique_timestamps, last_index = np.unique(timestamps[::-1], return_index=True)
+    if len(unique_timestamps) != len(timestamps):
+        keep = len(timestamps) - 1 - last_index
+        timestamps, values = timestamps[keep], values[keep]
+
+    # Build the binary COPY payload in one vectorized pass: every tuple has two
+    # fields of 8 bytes each. Nulls travel as NaN and are restored by the merge.
+    records = np.empty(len(timestamps), dtype=_COPY_RECORD)
+    records["field_count"] = 2
+    records["timestamp_length"] = 8
+    records["timestamp"] = timestamps
+    records["value_length"] = 8
+    records["value"] = values
+    buffer = io.BytesIO()
+    buffer.write(_COPY_HEADER)
+    buffer.write(records.tobytes())
+    buffer.write(_COPY_TRAILER)
+    buffer.seek(0)
+
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS energy_facts_staging (
+            timestamp BIGINT,
+            value FLOAT
+        ) ON COMMIT DELETE ROWS;
+    """)
+    cur.copy_expert("COPY energy_facts_staging (timestamp, value) FROM STDIN WITH (FORMAT binary)", buffer)
+    cur.execute(
+        """
+        INSERT INTO energy_facts (series_id, timestamp, value)
+        SELECT %s, timestamp, NULLIF(value, 'NaN') FROM energy_facts_staging
+        ON CONFLICT (series_id, timestamp)
+        DO UPDATE SET value = EXCLUDED.value
+        WHERE energy_facts.value IS DISTINCT FROM EXCLUDED.value;
+        """,
+        (series_id,)
+    )
+    return cur.rowcount
+
+def select_timestamps(timestamps, timestamp_mode, specific_timestamp):
+    """Choose which chunk timestamps to process based on TIMESTAMP_MODE ("incremental" is planned by WatermarkTracker)."""
+    if timestamp_mode == "all":
+        return timestamps
+    if timestamp_mode == "specific":
+        if specific_timestamp:
+            return [specific_timestamp]
+        print("No SPECIFIC_TIMESTAMP provided in config, defaulting to newest.")
+    # default to newest
+    return [timestamps[-1]]
+
+def load_chunk(chunk, filter_label, filter_id, region, resolution, ts, db_pool, load_mode, tracker=None, chunk_states=None):
+    """
+    Prepare one fetched chunk and upsert it; runs on a loader thread.
+    Chunks that chunk_states reports as unchanged are neither parsed nor upserted.
+    With a WatermarkTracker the series' incremental state is advanced afterwards.
+    Returns the number of prepared rows (0 for skipped chunks).
+    """
+    chunk_key = (filter_id, region, resolution, ts)
+    prepared_timeseries_data = None
+    if chunk_states is not None and chunk_states.is_unchanged(chunk_key, chunk):
+        print(f"Unchanged chunk {ts} for combination {filter_label} ({filter_id}), {region}, {resolution}; skipping.")
+    else:
+        timeseries_data = chunk.series()
+        if not timeseries_data:
+            print(f"No time series data for timestamp {ts} for combination {filter_label} ({filter_id}), {region}, {resolution}.")
+            return 0
+        prepared_timeseries_data = prepare_data(timeseries_data)
+        if len(prepared_timeseries_data[0]):
+            insert_data_into_db(prepared_timeseries_data, filter_label, filter_id, region, resolution, db_pool, mode=load_mode)
+        else:
+            print("No prepared data to insert for this timestamp.")
+        if chunk_states is not None:
+            with db_pool.connection() as conn:
+                chunk_states.save(conn, chunk_key, chunk)
+
+    if tracker is not None:
+        max_data_timestamp = None
+        if prepared_timeseries_data is not None:
+            timestamps, values = prepared_timeseries_data
+            with_data = timestamps[~np.isnan(values)]
+            if len(with_data):
+                max_data_timestamp = int(with_data.max())
+        key = (filter_id, region, resolution)
+        last_chunk_timestamp, max_data_timestamp = tracker.mark_loaded(key, ts, max_data_timestamp)
+        with db_pool.connection() as conn:
+            save_watermark(conn, key, last_chunk_timestamp, max_data_timestamp)
+    return len(prepared_timeseries_data[0]) if prepared_timeseries_data is not None else 0
+
+async def _fetch_worker(client, work_queue, load_queue, chunk_states):
+    """Fetch chunk files from work_queue and hand them to the loaders."""
+    while True:
+        unit = await work_queue.get()
+        if unit is None:
+            return
+        filter_label, filter_id, region, resolution, ts, is_open = unit
+        etag, last_modified = None, None
+        if chunk_states is not None:
+            etag, last_modified = chunk_states.validators((filter_id, region, resolution, ts))
+        try:
+            chunk = await client.fetch_chunk(filter_id, region, resolution, ts, etag=etag, last_modified=last_modified, is_open=is_open)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Failed to fetch timestamp {ts} for combination {filter_label} ({filter_id}), {region}, {resolution}: {e}")
+            continue
+        if chunk is None:
+            print(f"No time series data for timestamp {ts} for combination {filter_label} ({filter_id}), {region}, {resolution}.")
+            continue
+        # Blocks when the loaders fall behind, bounding memory held by fetched chunks.
+        await load_queue.put((chunk, filter_label, filter_id, region, resolution, ts))
+
+async def _load_worker(load_queue, db_pool, load_mode, tracker, chunk_states):
+    """
+    Drain load_queue, running the blocking DB work in a thread so fetching continues.
+    Returns the number of rows this worker loaded.
+    """
+    rows = 0
+    while True:
+        item = await load_queue.get()
+        if item is None:
+            return rows
+        chunk, filter_label, filter_id, region, resolution, ts = item
+        try:
+            rows += await asyncio.to_thread(load_chunk, chunk, filter_label, filter_id, region, resolution, ts, db_pool, load_mode, tracker, chunk_states)
+        except Exception as e:
+            # Any failure only skips this chunk; a dead loader would leave the
+            # fetchers blocked on a full load_queue.
+            print(f"Failed to load chunk {ts} for combination {filter_label} ({filter_id}), {region}, {resolution}: {e}")
+
+def build_combinations(config):
+    """All combinations of FILTER_IDS (each a [label, id] pair), REGIONS, and RESOLUTIONS."""
+    return [
+        (filter_label, filter_id, region, resolution)
+        for filter_label, filter_id in config.get("FILTER_IDS", [])
+        for region in config.get("REGIONS", [])
+        for resolution in config.get("RESOLUTIONS", [])
+    ]
+
+def create_client(config, cache=None, concurrency=None, rate_limit=None):
+    """Build a SmardClient from the FETCH_* and SMARD_* config values."""
+    return SmardClient(
+        base_url=config.get("SMARD_BASE_URL", SMARD_BASE_URL),
+        concurrency=concurrency or int(config.get("FETCH_CONCURRENCY", 8)),
+        rate_limit=rate_limit or float(config.get("FETCH_RATE_LIMIT", 10)),
+        cache=cache,
+        index_ttl=float(config.get("SMARD_CACHE_INDEX_TTL", 3600)),
+        offline=bool(config.get("SMARD_CACHE_OFFLINE", False)),
+    )
+
+async def resolve_timestamps(client, combinations):
+    """
+    Fetch the chunk index of every combination concurrently and return
+    (combination, timestamps) pairs for those that have chunks.
+    """
+    timestamp_lists = await asyncio.gather(*(
+        client.fetch_timestamps(filter_id, region, resolution)
+        for _, filter_id, region, resolution in combinations
+    ), return_exceptions=True)
+
+    resolved = []
+    for (filter_label, filter_id, region, resolution), timestamps in zip(combinations, timestamp_lists):
+        if isinstance(timestamps, BaseException):
+            print(f"Failed to fetch timestamps for combination {filter_label} ({filter_id}), {region}, {resolution}: {timestamps}")
+            continue
+        if not timestamps:
+            print(f"No timestamps found for combination {filter_label} ({filter_id}), {region}, {resolution}.")
+            continue
+        resolved.append(((filter_label, filter_id, region, resolution), timestamps))
+    return resolved
+
+async def fetch_and_load(config, db_pool, combinations, timestamp_mode, specific_timestamp, load_mode):
+    """
+    Fetch every selected chunk concurrently and load it through a bounded queue,
+    so network and database work overlap.
+    """
+    tracker = None
+    if timestamp_mode == "incremental":
+        with db_pool.connection() as conn:
+            tracker = WatermarkTracker(load_watermarks(conn))
+    chunk_states = None
+    if config.get("CHANGE_DETECTION", True):
+        with db_pool.connection() as conn:
+            chunk_states = ChunkStateStore.load(conn)
+
+    decoder = json_decoding.configure(config.get("JSON_DECODER", "auto"))
+    print(f"Decoding SMARD payloads with {decoder}.")
+    cache = create_cache(config)
+    concurrency = int(config.get("FETCH_CONCURRENCY", 8))
+    loader_workers = int(config.get("LOADER_WORKERS", 2))
+    async with create_client(config, cache=cache) as client:
+        # Resolve the chunk timestamps of every combination first.
+        work_queue = asyncio.Queue()
+        for (filter_label, filter_id, region, resolution), timestamps in await resolve_timestamps(client, combinations):
+            if tracker is not None:
+                selected = tracker.plan((filter_id, region, resolution), timestamps)
+            else:
+                selected = select_timestamps(timestamps, timestamp_mode, specific_timestamp)
+            for ts in selected:
+                # The latest chunk is still open and may receive new values.
+                work_queue.put_nowait((filter_label, filter_id, region, resolution, ts, ts == timestamps[-1]))
+
+        load_queue = asyncio.Queue(maxsize=int(config.get("LOAD_QUEUE_SIZE", 32)))
+        loaders = [asyncio.create_task(_load_worker(load_queue, db_pool, load_mode, tracker, chunk_states)) for _ in range(loader_workers)]
+        fetchers = [asyncio.create_task(_fetch_worker(client, work_queue, load_queue, chunk_states)) for _ in range(concurrency)]
+        for _ in fetchers:
+            work_queue.put_nowait(None)
+        await asyncio.gather(*fetchers)
+        for _ in loaders:
+            await load_queue.put(None)
+        rows = sum(await asyncio.gather(*loaders))
+
+    if rows:
+        with db_pool.connection() as conn:
+            bump_load_generation(conn)
+    if chunk_states is not None:
+        print(chunk_states.format_stats())
+    if cache is not None:
+        print(cache.format_stats())
+        cache.close()
 
 def main():
     # Load configuration from config.yaml
@@ -123,51 +407,30 @@ def main():
     resolutions = config.get("RESOLUTIONS", [])
     
     # Options for timestamp selection.
-    timestamp_mode = config.get("TIMESTAMP_MODE", "newest")  # "newest", "all", or "specific"
+    timestamp_mode = config.get("TIMESTAMP_MODE", "newest")  # "newest", "all", "specific" or "incremental"
     specific_timestamp = config.get("SPECIFIC_TIMESTAMP", None)  # used only if mode is "specific"
+    load_mode = get_load_mode(config)
 
     if not filter_ids or not regions or not resolutions:
         print("Missing configuration values in config.yaml.")
         return
 
-    # Wait for the database to be ready before processing.
-    if not wait_for_db(host="db", database="energydata", user="user", password="password"):
-        return
+    # One connection pool is shared by every loader call and drained at exit.
+    db_pool = create_pool(config)
+    try:
+        # Wait for the database to be ready before processing.
+        if not wait_for_db(db_pool):
+            return
+
+        # Create or upgrade tables and indexes once, so the insert path can assume they exist.
+        with db_pool.connection() as conn:
+            migrate(conn)
+
+        combinations = build_combinations(config)
+        asyncio.run(fetch_and_load(config, db_pool, combinations, timestamp_mode, specific_timestamp, load_mode))
+    finally:
+        print(db_pool.format_stats())
+        db_pool.closeall()
 
-    # Iterate over all combinations of FILTER_IDS (each now a tuple), REGIONS, and RESOLUTIONS.
-    for filter_tuple in filter_ids:
-        # Unpack the tuple: filter_label is a descriptive name; filter_id is the numeric id for API calls.
-        filter_label, filter_id = filter_tuple
-        for region in regions:
-            for resolution in resolutions:
-                timestamps = fetch_timestamps(filter_id, region, resolution)
-                if not timestamps:
-                    print(f"No timestamps found for combination {filter_label} ({filter_id}), {region}, {resolution}.")
-                    continue
-
-                # Choose which timestamps to process based on TIMESTAMP_MODE.
-                if timestamp_mode == "all":
-                    timestamps_to_process = timestamps
-                elif timestamp_mode == "specific":
-                    if specific_timestamp:
-                        timestamps_to_process = [specific_timestamp]
-                    else:
-                        print("No SPECIFIC_TIMESTAMP provided in config, defaulting to newest.")
-                        timestamps_to_process = [timestamps[-1]]
-                else:  # default to newest
-                    timestamps_to_process = [timestamps[-1]]
-                
-                # Process each selected timestamp.
-                for ts in timestamps_to_process:
-                    timeseries_data = fetch_timeseries(filter_id, region, resolution, ts)
-                    if not timeseries_data:
-                        print(f"No time series data for timestamp {ts} for combination {filter_label} ({filter_id}), {region}, {resolution}.")
-                        continue
-                    prepared_timeseries_data = prepare_data(timeseries_data)
-                    if prepared_timeseries_data:
-                        insert_data_into_db(prepared_timeseries_data, filter_label, filter_id, region, resolution)
-                    else:
-                        print("No prepared data to insert for this timestamp.")
-    
 if __name__ == "__main__":
     main()
@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+
+# Connection settings for the Docker Compose "db" service.
+DB_SETTINGS = {
+    "host": "db",
+    "database": "energydata",
+    "user": "user",
+    "password": "password",
+}
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections shared across an ETL run.
+    Connections are opened lazily up to maxconn and reused afterwards; callers
+    block when every connection is checked out. Checkout statistics are kept in
+    self.stats for tuning the pool size.
+    """
+
+    def __init__(self, maxconn=5, **connect_kwargs):
+        self.maxconn = maxconn
+        self._connect_kwargs = connect_kwargs or dict(DB_SETTINGS)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {
+            "checkouts": 0,
+            "hits": 0,          # checkout served by an idle pooled connection
+            "misses": 0,        # checkout that had to open a new connection
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    def getconn(self):
+        """Check out a connection, waiting for a free slot if the pool is exhausted."""
+        if self._closed:
+            raise psycopg2.InterfaceError("connection pool is closed")
+        start = time.perf_counter()
+        self._slots.acquire()
+        waited = time.perf_counter() - start
+
+        conn = None
+        while conn is None:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if conn.closed:
+                conn = None
+
+        hit = conn is not None
+        if not hit:
+            try:
+                conn = psycopg2.connect(**self._connect_kwargs)
+            except Exception:
+                self._slots.release()
+                raise
+
+        with self._lock:
+            self.stats["checkouts"] += 1
+            self.stats["hits" if hit else "misses"] += 1
+            self.stats["wait_seconds"] += waited
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], waited)
+        return conn
+
+    def putconn(self, conn, close=False):
+        """Return a connection to the pool; broken or explicitly closed ones are discarded."""
+        try:
+            if close or self._closed or conn.closed:
+                conn.close()
+            else:
+                # Never hand out a connection with a transaction left open.
+                conn.rollback()
+                self._idle.put(conn)
+        except psycopg2.Error:
+            conn.close()
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and always returns it."""
+        conn = self.getconn()
+        try:
+            yield conn
+        except psycopg2.OperationalError:
+            self.putconn(conn, close=True)
+            raise
+        except Exception:
+            self.putconn(conn)
+            raise
+        else:
+            self.putconn(conn)
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def format_stats(self):
+        """Human-readable summary of the checkout counters."""
+        stats = self.stats
+        checkouts = stats["checkouts"] or 1
+        return (
+            f"Connection pool: {stats['checkouts']} checkouts, {stats['hits']} hits, "
+            f"{stats['misses']} misses ({stats['hits'] / checkouts:.1%} hit rate), "
+            f"checkout wait total {stats['wait_seconds']:.3f}s, max {stats['max_wait_seconds']:.3f}s."
+        )
+
+def create_pool(config):
+    """Build a ConnectionPool sized from the DB_POOL_SIZE config value."""
+    return ConnectionPool(maxconn=int(config.get("DB_POOL_SIZE", 5)), **DB_SETTINGS)
@@ -0,0 +1,60 @@
+import numpy as np
+
+# Point selection for charts: each function takes x and y arrays and a point
+# budget and returns the sorted indices of the points to keep. Both keep the
+# first and last point and preserve peaks that plain striding would skip.
+def lttb_indices(x, y, max_points):
+    """Largest-triangle-three-buckets: the most visually significant point per bucket."""
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    # max_points - 2 buckets between the fixed first and last point.
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    selected = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        # Twice the area of the triangle (selected point, candidate, next bucket average).
+        areas = np.abs(
+            (x[selected] - next_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (next_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+    return indices
+
+def minmax_indices(x, y, max_points):
+    """The minimum and maximum of each of max_points / 2 buckets."""
+    n = len(x)
+    if max_points >= n or max_points < 4:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, (max_points - 2) // 2 + 1).astype(np.int64)
+    indices = [0]
+    for start, end in zip(edges[:-1], edges[1:]):
+        bucket = y[start:end]
+        indices.extend((start + int(np.argmin(bucket)), start + int(np.argmax(bucket))))
+    indices.append(n - 1)
+    return np.unique(indices)
+
+DOWNSAMPLERS = {
+    "lttb": lttb_indices,
+    "minmax": minmax_indices,
+}
+
+def downsample(df, max_points, method="lttb", x="timestamp", y="value"):
+    """
+    Return at most max_points rows of df (sorted by x) chosen by method.
+    Rows without a y value are dropped first; df itself is left untouched.
+    """
+    df = df[df[y].notna()]
+    if len(df) <= max_points:
+        return df
+    indices = DOWNSAMPLERS[method](
+        df[x].to_numpy(dtype=np.float64), df[y].to_numpy(dtype=np.float64), max_points
+    )
+    return df.iloc[indices]
@@ -0,0 +1,123 @@
+import argparse
+import datetime
+import sys
+
+import psycopg2
+
+from dashboard_data import date_range_ms
+from db import DB_SETTINGS
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+# Rows fetched per round trip from the server-side cursor, and written per
+# Parquet row group.
+PARQUET_CHUNK_ROWS = 100_000
+
+_SLICE_QUERY = """
+    SELECT timestamp, value
+    FROM energy_facts
+    WHERE series_id = %s AND timestamp >= %s AND timestamp < %s
+    ORDER BY timestamp
+"""
+
+def find_series_id(conn, filter_id, region, resolution):
+    """Return the series_id of a (filter_id, region, resolution) combination, or None."""
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT series_id FROM series WHERE filter_id = %s AND region = %s AND resolution = %s;",
+        (filter_id, region, resolution)
+    )
+    row = cur.fetchone()
+    cur.close()
+    return row[0] if row else None
+
+def export_csv(conn, series_id, start_date, end_date, out):
+    """
+    Stream one series between start_date and end_date (both inclusive) as CSV
+    into the binary file object out with COPY ... TO STDOUT; the rows never
+    pass through Python objects. Returns the number of rows written.
+    """
+    cur = conn.cursor()
+    query = cur.mogrify(_SLICE_QUERY, (series_id, *date_range_ms(start_date, end_date))).decode()
+    cur.copy_expert(
+        f"""
+        COPY (
+            SELECT timestamp, to_char(to_timestamp(timestamp / 1000.0) AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS') AS datetime, value
+            FROM ({query}) slice
+        ) TO STDOUT WITH (FORMAT csv, HEADER)
+        """,
+        out
+    )
+    row_count = cur.rowcount
+    cur.close()
+    conn.commit()
+    return row_count
+
+def export_parquet(conn, series_id, start_date, end_date, out, chunk_rows=PARQUET_CHUNK_ROWS):
+    """
+    Stream one series between start_date and end_date (both inclusive) into a
+    Parquet file (path or binary file object) through a server-side cursor,
+    writing one row group per chunk_rows rows. Needs pyarrow.
+    Returns the number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([("timestamp", pa.int64()), ("datetime", pa.timestamp("ms")), ("value", pa.float64())])
+    cur = conn.cursor(name="energy_export")
+    cur.itersize = chunk_rows
+    cur.execute(_SLICE_QUERY, (series_id, *date_range_ms(start_date, end_date)))
+    row_count = 0
+    try:
+        with pq.ParquetWriter(out, schema) as writer:
+            while True:
+                rows = cur.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                timestamps, values = zip(*rows)
+                timestamps = pa.array(timestamps, type=pa.int64())
+                writer.write_table(pa.Table.from_arrays(
+                    [timestamps, timestamps.cast(pa.timestamp("ms")), pa.array(values, type=pa.float64())],
+                    schema=schema
+                ))
+                row_count += len(rows)
+    finally:
+        cur.close()
+        conn.commit()
+    return row_count
+
+EXPORTERS = {
+    "csv": export_csv,
+    "parquet": export_parquet,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Export one series and date range as CSV or Parquet.")
+    parser.add_argument("--filter-id", type=int, required=True)
+    parser.add_argument("--region", required=True)
+    parser.add_argument("--resolution", required=True)
+    parser.add_argument("--start", type=datetime.date.fromisoformat, required=True, help="First day (YYYY-MM-DD).")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, required=True, help="Last day, inclusive.")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--output", default="-", help="Output file ('-' writes CSV to stdout).")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_SETTINGS)
+    try:
+        series_id = find_series_id(conn, args.filter_id, args.region, args.resolution)
+        if series_id is None:
+            print(f"No series for {args.filter_id}, {args.region}, {args.resolution}.", file=sys.stderr)
+            sys.exit(1)
+        if args.output == "-":
+            if args.format != "csv":
+                parser.error("Parquet output needs --output FILE.")
+            row_count = export_csv(conn, series_id, args.start, args.end, sys.stdout.buffer)
+        else:
+            with open(args.output, "wb") as out:
+                row_count = EXPORTERS[args.format](conn, series_id, args.start, args.end, out)
+        print(f"Exported {row_count} rows.", file=sys.stderr)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
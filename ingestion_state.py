@@ -0,0 +1,155 @@
+import threading
+
+def load_watermarks(conn):
+    """
+    Read the incremental-ingestion state table into a dict keyed by
+    (filter_id, region, resolution) -> (last_chunk_timestamp, max_data_timestamp).
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT filter_id, region, resolution, last_chunk_timestamp, max_data_timestamp
+        FROM ingestion_state;
+    """)
+    state = {(row[0], row[1], row[2]): (row[3], row[4]) for row in cur.fetchall()}
+    cur.close()
+    return state
+
+def save_watermark(conn, key, last_chunk_timestamp, max_data_timestamp):
+    """Persist the watermark of one series; timestamps only ever move forward."""
+    filter_id, region, resolution = key
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT INTO ingestion_state (filter_id, region, resolution, last_chunk_timestamp, max_data_timestamp)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (filter_id, region, resolution) DO UPDATE SET
+            last_chunk_timestamp = GREATEST(ingestion_state.last_chunk_timestamp, EXCLUDED.last_chunk_timestamp),
+            max_data_timestamp = GREATEST(ingestion_state.max_data_timestamp, EXCLUDED.max_data_timestamp),
+            updated_at = now();
+        """,
+        (filter_id, region, resolution, last_chunk_timestamp, max_data_timestamp)
+    )
+    conn.commit()
+    cur.close()
+
+def bump_load_generation(conn):
+    """Signal readers such as the dashboard cache that new data has been loaded."""
+    cur = conn.cursor()
+    cur.execute("UPDATE load_generation SET generation = generation + 1, updated_at = now();")
+    conn.commit()
+    cur.close()
+
+class WatermarkTracker:
+    """
+    Plans and tracks TIMESTAMP_MODE "incremental" for each series.
+    Only chunks newer than the last fully-loaded chunk are fetched, plus the
+    latest chunk, which is still open and may receive new values. The
+    watermark advances past a closed chunk only once it and every older
+    planned chunk have loaded, so a failed chunk is retried on the next run.
+    """
+
+    def __init__(self, state):
+        self.state = dict(state)
+        self._pending = {}
+        self._completed = {}
+        self._lock = threading.Lock()
+
+    def plan(self, key, timestamps):
+        """Return the chunk timestamps of one series that need fetching."""
+        last_chunk_timestamp = self.state.get(key, (None, None))[0]
+        closed = [
+            ts for ts in timestamps[:-1]
+            if last_chunk_timestamp is None or ts > last_chunk_timestamp
+        ]
+        with self._lock:
+            self._pending[key] = set(closed)
+            self._completed[key] = set()
+        return closed + [timestamps[-1]]
+
+    def mark_loaded(self, key, chunk_timestamp, max_data_timestamp):
+        """
+        Record a loaded chunk and return the series' new
+        (last_chunk_timestamp, max_data_timestamp).
+        """
+        with self._lock:
+            last_chunk_timestamp, previous_max = self.state.get(key, (None, None))
+            pending = self._pending.setdefault(key, set())
+            completed = self._completed.setdefault(key, set())
+            if chunk_timestamp in pending:
+                pending.discard(chunk_timestamp)
+                completed.add(chunk_timestamp)
+            # Advance to the newest completed chunk with no unfinished chunk before it.
+            oldest_pending = min(pending) if pending else None
+            for ts in completed:
+                if oldest_pending is None or ts < oldest_pending:
+                    if last_chunk_timestamp is None or ts > last_chunk_timestamp:
+                        last_chunk_timestamp = ts
+            if max_data_timestamp is not None and (previous_max is None or max_data_timestamp > previous_max):
+                previous_max = max_data_timestamp
+            self.state[key] = (last_chunk_timestamp, previous_max)
+            return self.state[key]
+
+class ChunkStateStore:
+    """
+    Content hashes and HTTP validators of previously loaded chunk files, used
+    to skip parsing and upserting chunks whose content has not changed.
+    Counts skipped and loaded chunks for the end-of-run report.
+    """
+
+    def __init__(self, states):
+        self.states = dict(states)
+        self.stats = {"chunks_unchanged": 0, "chunks_loaded": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, conn):
+        """Read the chunk_state table keyed by (filter_id, region, resolution, chunk_timestamp)."""
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT filter_id, region, resolution, chunk_timestamp, content_hash, etag, last_modified
+            FROM chunk_state;
+        """)
+        states = {tuple(row[:4]): tuple(row[4:]) for row in cur.fetchall()}
+        cur.close()
+        return cls(states)
+
+    def validators(self, key):
+        """Return the (etag, last_modified) to send with a conditional request."""
+        _, etag, last_modified = self.states.get(key, (None, None, None))
+        return etag, last_modified
+
+    def is_unchanged(self, key, chunk):
+        """True if the chunk was answered with 304 or hashes to the stored content."""
+        unchanged = chunk.not_modified or (
+            key in self.states and self.states[key][0] == chunk.content_hash
+        )
+        with self._lock:
+            self.stats["chunks_unchanged" if unchanged else "chunks_loaded"] += 1
+        return unchanged
+
+    def save(self, conn, key, chunk):
+        """Record the hash and validators of a successfully loaded chunk."""
+        filter_id, region, resolution, chunk_timestamp = key
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO chunk_state (filter_id, region, resolution, chunk_timestamp, content_hash, etag, last_modified)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (filter_id, region, resolution, chunk_timestamp) DO UPDATE SET
+                content_hash = EXCLUDED.content_hash,
+                etag = EXCLUDED.etag,
+                last_modified = EXCLUDED.last_modified,
+                loaded_at = now();
+            """,
+            (filter_id, region, resolution, chunk_timestamp, chunk.content_hash, chunk.etag, chunk.last_modified)
+        )
+        conn.commit()
+        cur.close()
+        with self._lock:
+            self.states[key] = (chunk.content_hash, chunk.etag, chunk.last_modified)
+
+    def format_stats(self):
+        return (
+            f"Change detection: {self.stats['chunks_loaded']} chunks loaded, "
+            f"{self.stats['chunks_unchanged']} unchanged chunks skipped."
+        )
@@ -0,0 +1,56 @@
+import json
+
+# Decoders that turn raw response bytes into Python objects. orjson and
+# simdjson parse the UTF-8 bytes directly; the stdlib decoder is the fallback.
+def _stdlib_loads(body):
+    return json.loads(body)
+
+def _orjson_loads(body):
+    import orjson
+    return orjson.loads(body)
+
+def _simdjson_loads(body):
+    import simdjson
+    return simdjson.loads(body)
+
+DECODERS = {
+    "orjson": _orjson_loads,
+    "simdjson": _simdjson_loads,
+    "json": _stdlib_loads,
+}
+
+# Preference order for JSON_DECODER: "auto".
+AUTO_ORDER = ("orjson", "simdjson", "json")
+
+def _is_available(name):
+    if name == "json":
+        return True
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+def get_decoder(name="auto"):
+    """
+    Return (name, loads) for the requested decoder. "auto" picks the fastest
+    installed one; an unknown or missing decoder falls back to the stdlib.
+    """
+    if name == "auto":
+        name = next(candidate for candidate in AUTO_ORDER if _is_available(candidate))
+    elif name not in DECODERS or not _is_available(name):
+        print(f"JSON decoder '{name}' is not available, falling back to json.")
+        name = "json"
+    return name, DECODERS[name]
+
+_active_name, _active_loads = get_decoder()
+
+def configure(name="auto"):
+    """Select the decoder used by loads(); returns the chosen decoder name."""
+    global _active_name, _active_loads
+    _active_name, _active_loads = get_decoder(name)
+    return _active_name
+
+def loads(body):
+    """Decode a JSON document from the raw response bytes."""
+    return _active_loads(body)
@@ -0,0 +1,104 @@
+import argparse
+import datetime
+
+import psycopg2
+
+from db import DB_SETTINGS
+
+# Years whose energy_facts partition this process has already ensured.
+_ensured_years = set()
+
+def _year(timestamp_ms):
+    return datetime.datetime.fromtimestamp(timestamp_ms / 1000, tz=datetime.timezone.utc).year
+
+def ensure_partitions(conn, from_ts, to_ts):
+    """
+    Make sure yearly energy_facts partitions cover [from_ts, to_ts] (ms).
+    Runs and commits in its own transaction, so call it before writing facts.
+    """
+    years = set(range(_year(from_ts), _year(to_ts) + 1))
+    if years <= _ensured_years:
+        return 0
+    cur = conn.cursor()
+    cur.execute("SELECT ensure_energy_facts_partitions(%s, %s);", (from_ts, to_ts))
+    created = cur.fetchone()[0]
+    conn.commit()
+    cur.close()
+    _ensured_years.update(years)
+    if created:
+        print(f"Created {created} energy_facts partition(s) for {min(years)}-{max(years)}.")
+    return created
+
+def list_partitions(conn):
+    """Return (name, bounds, estimated rows, total bytes) for each energy_facts partition."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::BIGINT, pg_total_relation_size(c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'energy_facts'::regclass
+        ORDER BY c.relname;
+    """)
+    partitions = cur.fetchall()
+    cur.close()
+    return partitions
+
+def detach_partitions(conn, before_year):
+    """
+    Detach the partitions of years before before_year. The detached tables
+    are kept as energy_facts_y<YEAR>_detached and can be archived or dropped.
+    """
+    detached = []
+    cur = conn.cursor()
+    for name, _, _, _ in list_partitions(conn):
+        if int(name.rsplit("_y", 1)[1]) >= before_year:
+            continue
+        cur.execute(f"ALTER TABLE energy_facts DETACH PARTITION {name};")
+        cur.execute(f"ALTER TABLE {name} RENAME TO {name}_detached;")
+        detached.append(name)
+    conn.commit()
+    cur.close()
+    _ensured_years.clear()
+    return detached
+
+def compact_partition(conn, year):
+    """Rewrite one year's partition in (series_id, timestamp) order and refresh its statistics."""
+    name = f"energy_facts_y{year}"
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = %s::regclass AND indisprimary;",
+        (name,)
+    )
+    index_name = cur.fetchone()[0]
+    cur.execute(f"CLUSTER {name} USING {index_name};")
+    cur.execute(f"ANALYZE {name};")
+    conn.commit()
+    cur.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and maintain the yearly energy_facts partitions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List partitions with their row estimates and sizes.")
+    detach = commands.add_parser("detach", help="Detach partitions of old years.")
+    detach.add_argument("--before", type=int, required=True, help="Detach all years before this one.")
+    compact = commands.add_parser("compact", help="Rewrite a closed year's partition in index order.")
+    compact.add_argument("year", type=int)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_SETTINGS)
+    try:
+        if args.command == "list":
+            for name, bounds, rows, size in list_partitions(conn):
+                # reltuples is -1 until the partition has been analyzed.
+                print(f"{name:<24}{rows if rows >= 0 else '?':>12} rows{size / (1024 * 1024):>10.1f} MiB  {bounds}")
+        elif args.command == "detach":
+            detached = detach_partitions(conn, args.before)
+            print(f"Detached {len(detached)} partition(s): {', '.join(detached) or '-'}.")
+        else:
+            compact_partition(conn, args.year)
+            print(f"Compacted energy_facts_y{args.year}.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
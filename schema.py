@@ -0,0 +1,289 @@
+import psycopg2
+
+# Ordered list of schema migrations as (version, description, statements).
+# Append new entries with the next version number; never edit applied ones.
+MIGRATIONS = [
+    (1, "create energy_timeseries", [
+        """
+        CREATE TABLE IF NOT EXISTS energy_timeseries (
+            id SERIAL PRIMARY KEY,
+            filter_label TEXT,
+            filter_id INTEGER,
+            region TEXT,
+            resolution TEXT,
+            timestamp BIGINT,
+            value FLOAT,
+            UNIQUE (filter_id, region, resolution, timestamp)
+        );
+        """,
+    ]),
+    (2, "create ingestion_state for incremental mode", [
+        """
+        CREATE TABLE IF NOT EXISTS ingestion_state (
+            filter_id INTEGER,
+            region TEXT,
+            resolution TEXT,
+            last_chunk_timestamp BIGINT,
+            max_data_timestamp BIGINT,
+            updated_at TIMESTAMPTZ DEFAULT now(),
+            PRIMARY KEY (filter_id, region, resolution)
+        );
+        """,
+    ]),
+    (3, "create chunk_state for change detection", [
+        """
+        CREATE TABLE IF NOT EXISTS chunk_state (
+            filter_id INTEGER,
+            region TEXT,
+            resolution TEXT,
+            chunk_timestamp BIGINT,
+            content_hash TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            loaded_at TIMESTAMPTZ DEFAULT now(),
+            PRIMARY KEY (filter_id, region, resolution, chunk_timestamp)
+        );
+        """,
+    ]),
+    (4, "create backfill_checkpoint for resumable backfills", [
+        """
+        CREATE TABLE IF NOT EXISTS backfill_checkpoint (
+            filter_id INTEGER,
+            region TEXT,
+            resolution TEXT,
+            chunk_timestamp BIGINT,
+            row_count INTEGER,
+            completed_at TIMESTAMPTZ DEFAULT now(),
+            PRIMARY KEY (filter_id, region, resolution, chunk_timestamp)
+        );
+        """,
+    ]),
+    (5, "create load_generation for dashboard cache invalidation", [
+        """
+        CREATE TABLE IF NOT EXISTS load_generation (
+            id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+            generation BIGINT NOT NULL,
+            updated_at TIMESTAMPTZ DEFAULT now()
+        );
+        """,
+        "INSERT INTO load_generation (id, generation) VALUES (TRUE, 0) ON CONFLICT DO NOTHING;",
+    ]),
+    (6, "index energy_timeseries for the dashboard access paths", [
+        # Series + time range lookups (dashboard, bounds, skip scan) become
+        # index-only scans; the unique index also replaces the old UNIQUE
+        # constraint as the ON CONFLICT arbiter, so writes maintain one index.
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS energy_timeseries_series_timestamp_idx
+        ON energy_timeseries (filter_id, region, resolution, timestamp) INCLUDE (value);
+        """,
+        """
+        ALTER TABLE energy_timeseries
+        DROP CONSTRAINT IF EXISTS energy_timeseries_filter_id_region_resolution_timestamp_key;
+        """,
+        # Cross-series date range scans over the append-mostly history.
+        """
+        CREATE INDEX IF NOT EXISTS energy_timeseries_timestamp_brin
+        ON energy_timeseries USING BRIN (timestamp);
+        """,
+    ]),
+    (7, "normalize energy_timeseries into series and energy_facts", [
+        # One small dimension row per series instead of repeating the label,
+        # region and resolution text on every data point.
+        """
+        CREATE TABLE series (
+            series_id SMALLSERIAL PRIMARY KEY,
+            filter_id INTEGER NOT NULL,
+            label TEXT,
+            region TEXT NOT NULL,
+            resolution TEXT NOT NULL,
+            UNIQUE (filter_id, region, resolution)
+        );
+        """,
+        # Columns ordered widest first so rows carry no alignment padding.
+        """
+        CREATE TABLE energy_facts (
+            timestamp BIGINT NOT NULL,
+            value FLOAT,
+            series_id SMALLINT NOT NULL REFERENCES series (series_id),
+            PRIMARY KEY (series_id, timestamp) INCLUDE (value)
+        );
+        """,
+        """
+        INSERT INTO series (filter_id, label, region, resolution)
+        SELECT DISTINCT ON (filter_id, region, resolution) filter_id, filter_label, region, resolution
+        FROM energy_timeseries
+        ORDER BY filter_id, region, resolution, timestamp DESC;
+        """,
+        """
+        INSERT INTO energy_facts (timestamp, value, series_id)
+        SELECT t.timestamp, t.value, s.series_id
+        FROM energy_timeseries t
+        JOIN series s USING (filter_id, region, resolution)
+        ORDER BY s.series_id, t.timestamp;
+        """,
+        "DROP TABLE energy_timeseries;",
+        "CREATE INDEX energy_facts_timestamp_brin ON energy_facts USING BRIN (timestamp);",
+        # Compatibility view with the old column names for readers.
+        """
+        CREATE VIEW energy_timeseries AS
+        SELECT f.series_id, s.label AS filter_label, s.filter_id, s.region, s.resolution, f.timestamp, f.value
+        FROM energy_facts f
+        JOIN series s ON s.series_id = f.series_id;
+        """,
+    ]),
+    (8, "partition energy_facts by year", [
+        "DROP VIEW energy_timeseries;",
+        "ALTER TABLE energy_facts RENAME TO energy_facts_unpartitioned;",
+        "ALTER INDEX energy_facts_pkey RENAME TO energy_facts_unpartitioned_pkey;",
+        "DROP INDEX energy_facts_timestamp_brin;",
+        """
+        CREATE TABLE energy_facts (
+            timestamp BIGINT NOT NULL,
+            value FLOAT,
+            series_id SMALLINT NOT NULL REFERENCES series (series_id),
+            PRIMARY KEY (series_id, timestamp) INCLUDE (value)
+        ) PARTITION BY RANGE (timestamp);
+        """,
+        "CREATE INDEX energy_facts_timestamp_brin ON energy_facts USING BRIN (timestamp);",
+        # Creates the missing yearly partitions energy_facts_y<YEAR> covering
+        # [from_ts, to_ts]; called by partitions.ensure_partitions before loads.
+        """
+        CREATE FUNCTION ensure_energy_facts_partitions(from_ts BIGINT, to_ts BIGINT) RETURNS INTEGER AS $$
+        DECLARE
+            created INTEGER := 0;
+            partition_name TEXT;
+        BEGIN
+            IF from_ts IS NULL OR to_ts IS NULL THEN
+                RETURN 0;
+            END IF;
+            -- Serialize concurrent loaders creating the same partition.
+            PERFORM pg_advisory_xact_lock(20250226);
+            FOR year IN EXTRACT(YEAR FROM to_timestamp(from_ts / 1000.0) AT TIME ZONE 'UTC')::INTEGER
+                     .. EXTRACT(YEAR FROM to_timestamp(to_ts / 1000.0) AT TIME ZONE 'UTC')::INTEGER LOOP
+                partition_name := format('energy_facts_y%s', year);
+                CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF energy_facts FOR VALUES FROM (%s) TO (%s)',
+                    partition_name,
+                    (EXTRACT(EPOCH FROM make_timestamptz(year, 1, 1, 0, 0, 0, 'UTC')) * 1000)::BIGINT,
+                    (EXTRACT(EPOCH FROM make_timestamptz(year + 1, 1, 1, 0, 0, 0, 'UTC')) * 1000)::BIGINT
+                );
+                created := created + 1;
+            END LOOP;
+            RETURN created;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        "SELECT ensure_energy_facts_partitions(MIN(timestamp), MAX(timestamp)) FROM energy_facts_unpartitioned;",
+        """
+        INSERT INTO energy_facts (timestamp, value, series_id)
+        SELECT timestamp, value, series_id FROM energy_facts_unpartitioned
+        ORDER BY series_id, timestamp;
+        """,
+        "DROP TABLE energy_facts_unpartitioned;",
+        """
+        CREATE VIEW energy_timeseries AS
+        SELECT f.series_id, s.label AS filter_label, s.filter_id, s.region, s.resolution, f.timestamp, f.value
+        FROM energy_facts f
+        JOIN series s ON s.series_id = f.series_id;
+        """,
+    ]),
+    (9, "create energy_rollups for hourly, daily, weekly and monthly aggregates", [
+        """
+        CREATE TABLE energy_rollups (
+            series_id SMALLINT NOT NULL REFERENCES series (series_id),
+            granularity TEXT NOT NULL,
+            bucket_start BIGINT NOT NULL,
+            min_value FLOAT,
+            max_value FLOAT,
+            sum_value FLOAT,
+            value_count INTEGER NOT NULL,
+            PRIMARY KEY (series_id, granularity, bucket_start)
+        );
+        """,
+        # Recomputes every rollup bucket of one series overlapping [from_ts, to_ts]
+        # from energy_facts; the ETL calls it after each chunk load.
+        """
+        CREATE FUNCTION refresh_energy_rollups(p_series_id INTEGER, from_ts BIGINT, to_ts BIGINT) RETURNS VOID AS $$
+        DECLARE
+            bucket TEXT;
+            lower_ts BIGINT;
+            upper_ts BIGINT;
+        BEGIN
+            -- Serialize refreshes of the same series so concurrent chunk loads
+            -- always see each other's committed facts.
+            PERFORM pg_advisory_xact_lock(20250227, p_series_id);
+            FOREACH bucket IN ARRAY ARRAY['hour', 'day', 'week', 'month'] LOOP
+                lower_ts := (EXTRACT(EPOCH FROM date_trunc(bucket, to_timestamp(from_ts / 1000.0) AT TIME ZONE 'UTC')) * 1000)::BIGINT;
+                upper_ts := (EXTRACT(EPOCH FROM date_trunc(bucket, to_timestamp(to_ts / 1000.0) AT TIME ZONE 'UTC')
+                                                + ('1 ' || bucket)::INTERVAL) * 1000)::BIGINT;
+                INSERT INTO energy_rollups (series_id, granularity, bucket_start, min_value, max_value, sum_value, value_count)
+                SELECT p_series_id, bucket,
+                       (EXTRACT(EPOCH FROM date_trunc(bucket, to_timestamp(f.timestamp / 1000.0) AT TIME ZONE 'UTC')) * 1000)::BIGINT,
+                       MIN(f.value), MAX(f.value), SUM(f.value), COUNT(f.value)
+                FROM energy_facts f
+                WHERE f.series_id = p_series_id AND f.timestamp >= lower_ts AND f.timestamp < upper_ts
+                GROUP BY 3
+                ON CONFLICT (series_id, granularity, bucket_start) DO UPDATE
+                SET min_value = EXCLUDED.min_value, max_value = EXCLUDED.max_value,
+                    sum_value = EXCLUDED.sum_value, value_count = EXCLUDED.value_count;
+            END LOOP;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        "SELECT refresh_energy_rollups(series_id, MIN(timestamp), MAX(timestamp)) FROM energy_facts GROUP BY series_id;",
+    ]),
+]
+
+# Arbitrary key for the advisory lock that serializes concurrent migrators
+# (e.g. the ETL and the dashboard starting at the same time).
+MIGRATION_LOCK_ID = 20250225
+
+def current_version(cur):
+    """Return the highest applied schema version (0 for a fresh database)."""
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version;")
+    return cur.fetchone()[0]
+
+def migrate(conn, target_version=None):
+    """
+    Bring the database schema up to the latest version (or target_version).
+    Each pending migration runs in its own transaction together with its
+    schema_version record. Returns the resulting schema version.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+    try:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMPTZ DEFAULT now()
+            );
+        """)
+        conn.commit()
+
+        version = current_version(cur)
+        for migration_version, description, statements in MIGRATIONS:
+            if migration_version <= version:
+                continue
+            if target_version is not None and migration_version > target_version:
+                break
+            try:
+                for statement in statements:
+                    cur.execute(statement)
+                cur.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s);",
+                    (migration_version, description)
+                )
+                conn.commit()
+            except psycopg2.Error:
+                conn.rollback()
+                print(f"Schema migration {migration_version} ({description}) failed.")
+                raise
+            print(f"Applied schema migration {migration_version}: {description}.")
+            version = migration_version
+        return version
+    finally:
+        cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
+        conn.commit()
+        cur.close()
@@ -0,0 +1,172 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Access times of cache hits are written in batches rather than with one
+# commit per lookup: after this many pending hits or this many seconds.
+ACCESS_FLUSH_ENTRIES = 256
+ACCESS_FLUSH_SECONDS = 5.0
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of raw SMARD responses.
+    Bodies are stored once per SHA-256 under objects/, and a small SQLite
+    manifest maps each URL to its body, HTTP validators and access times.
+    When the stored bodies exceed max_bytes the least recently used URLs are
+    evicted, together with any body no longer referenced.
+    """
+
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "evictions": 0}
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        # url -> access time of hits not yet written to the manifest.
+        self._pending_access = {}
+        self._last_access_flush = time.time()
+        # A generous busy timeout lets backfill worker processes share the manifest.
+        self._db = sqlite3.connect(os.path.join(directory, "manifest.sqlite3"), timeout=30, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._db.commit()
+
+    def _object_path(self, content_hash):
+        return os.path.join(self.directory, "objects", content_hash[:2], content_hash)
+
+    def lookup(self, url):
+        """
+        Return (body, etag, last_modified, fetched_at) for a cached URL, or None.
+        Entries whose body file has gone missing are dropped.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_hash, etag, last_modified, fetched_at FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self._object_path(row[0]), "rb") as file:
+                    body = file.read()
+            except FileNotFoundError:
+                self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+                self._db.commit()
+                return None
+            self._pending_access[url] = time.time()
+            if (len(self._pending_access) >= ACCESS_FLUSH_ENTRIES
+                    or time.time() - self._last_access_flush >= ACCESS_FLUSH_SECONDS):
+                self._write_access_times()
+                self._db.commit()
+            return body, row[1], row[2], row[3]
+
+    def _write_access_times(self):
+        # Caller holds self._lock and commits.
+        if self._pending_access:
+            self._db.executemany(
+                "UPDATE entries SET last_access = ? WHERE url = ?",
+                [(accessed, url) for url, accessed in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+        self._last_access_flush = time.time()
+
+    def is_fresh(self, fetched_at, max_age):
+        """max_age None means the entry never expires (closed chunks)."""
+        return max_age is None or time.time() - fetched_at < max_age
+
+    def touch(self, url):
+        """Mark a cached URL as revalidated against the server just now."""
+        with self._lock:
+            self._write_access_times()
+            now = time.time()
+            self._db.execute("UPDATE entries SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+            self._db.commit()
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Store a response body for url and evict old entries beyond max_bytes."""
+        content_hash = hashlib.sha256(body).hexdigest()
+        path = self._object_path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(body)
+            os.replace(tmp_path, path)
+        with self._lock:
+            # Pending access times go in first, so eviction sees them.
+            self._write_access_times()
+            now = time.time()
+            self._db.execute(
+                """
+                INSERT OR REPLACE INTO entries (url, content_hash, size, etag, last_modified, fetched_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (url, content_hash, len(body), etag, last_modified, now, now)
+            )
+            self._db.commit()
+            self._evict()
+        return content_hash
+
+    def count(self, stat):
+        """Increment one stats counter; safe to call from several threads."""
+        with self._lock:
+            self.stats[stat] = self.stats.get(stat, 0) + 1
+
+    def total_bytes(self):
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT content_hash, size FROM entries)"
+        ).fetchone()
+        return row[0]
+
+    def _evict(self):
+        # Caller holds self._lock.
+        while self.total_bytes() > self.max_bytes:
+            row = self._db.execute(
+                "SELECT url, content_hash FROM entries ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return
+            url, content_hash = row
+            self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            still_used = self._db.execute(
+                "SELECT 1 FROM entries WHERE content_hash = ? LIMIT 1", (content_hash,)
+            ).fetchone()
+            if still_used is None:
+                try:
+                    os.remove(self._object_path(content_hash))
+                except FileNotFoundError:
+                    pass
+            self._db.commit()
+            self.stats["evictions"] += 1
+
+    def close(self):
+        with self._lock:
+            self._write_access_times()
+            self._db.commit()
+            self._db.close()
+
+    def format_stats(self):
+        stats = self.stats
+        return (
+            f"Response cache: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+            f"{stats['misses']} misses, {stats['evictions']} evictions, "
+            f"{self.total_bytes() / (1024 * 1024):.1f} MiB on disk."
+        )
+
+def create_cache(config):
+    """Build the ResponseCache configured by SMARD_CACHE_DIR, or None if caching is disabled."""
+    directory = config.get("SMARD_CACHE_DIR")
+    if not directory:
+        return None
+    return ResponseCache(directory, max_bytes=int(config.get("SMARD_CACHE_MAX_MB", 1024)) * 1024 * 1024)
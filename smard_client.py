@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+import json_decoding
+
+SMARD_BASE_URL = "https://smard.api.proxy.bund.dev/app/chart_data"
+
+def decode_series(body):
+    """Decode a chunk file body into its list of [timestamp, value] pairs."""
+    data = json_decoding.loads(body)
+    return data if isinstance(data, list) else data.get("series", [])
+
+class ChunkResponse(namedtuple("ChunkResponse", ["body", "content_hash", "etag", "last_modified", "not_modified"])):
+    """
+    A fetched chunk file. The body is kept undecoded so unchanged chunks can be
+    skipped without parsing; body is None when the server answered 304.
+    """
+
+    def series(self):
+        return decode_series(self.body) if self.body is not None else []
+
+class HostRateLimiter:
+    """Space out request starts so each host sees at most `rate` requests per second."""
+
+    def __init__(self, rate):
+        self._interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, host):
+        if not self._interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class SmardClient:
+    """
+    Async SMARD API client sharing one keep-alive connection pool.
+    At most `concurrency` requests are in flight at once and request starts are
+    rate limited per host. base_url can point at a local stand-in server.
+    With a ResponseCache, fresh cached responses are served from disk, stale
+    ones are revalidated with conditional requests, and offline=True never
+    touches the network.
+    """
+
+    def __init__(self, base_url=SMARD_BASE_URL, concurrency=8, rate_limit=10.0, timeout=60,
+                 cache=None, index_ttl=3600, offline=False):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache = cache
+        self.index_ttl = index_ttl
+        self.offline = offline
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._limiter = HostRateLimiter(rate_limit)
+        self._session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+
+    async def _get(self, url, headers=None, max_age=None):
+        """
+        GET url and return (status, body bytes, response headers).
+        Cached responses younger than max_age seconds (None: any age) are
+        returned without a request.
+        """
+        # The SQLite manifest and body files are read and written in a
+        # thread, so cache I/O does not stall the other fetchers.
+        cached = await asyncio.to_thread(self.cache.lookup, url) if self.cache is not None else None
+        if cached is not None:
+            body, etag, last_modified, fetched_at = cached
+            cached_headers = {"ETag": etag, "Last-Modified": last_modified}
+            if self.offline or self.cache.is_fresh(fetched_at, max_age):
+                self.cache.count("hits")
+                return 200, body, cached_headers
+            # Revalidate with the cached validators, since we can serve the body on 304.
+            headers = {}
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        elif self.offline:
+            raise FileNotFoundError(f"{url} is not in the offline response cache")
+
+        async with self._semaphore:
+            await self._limiter.wait(urlsplit(url).netloc)
+            async with self._session.get(url, headers=headers) as response:
+                response.raise_for_status()
+                status, body, response_headers = response.status, await response.read(), response.headers
+
+        if self.cache is not None:
+            if status == 304 and cached is not None:
+                self.cache.count("revalidated")
+                await asyncio.to_thread(self.cache.touch, url)
+                return 200, cached[0], cached_headers
+            if status == 200:
+                self.cache.count("misses")
+                await asyncio.to_thread(
+                    self.cache.store, url, body, response_headers.get("ETag"), response_headers.get("Last-Modified")
+                )
+        return status, body, response_headers
+
+    async def _get_json(self, url, max_age=None):
+        _, body, _ = await self._get(url, max_age=max_age)
+        return json_decoding.loads(body)
+
+    async def fetch_timestamps(self, filter_id, region, resolution):
+        """Fetch available timestamps from the SMARD API using the numeric filter id."""
+        timestamp_url = f"{self.base_url}/{filter_id}/{region}/index_{resolution}.json"
+        print(f"Requesting timestamps from: {timestamp_url}")
+        try:
+            data = await self._get_json(timestamp_url, max_age=self.index_ttl)
+        except (aiohttp.ClientResponseError, FileNotFoundError) as e:
+            print(f"HTTP error occurred while fetching timestamps for filter {filter_id}, region {region}, resolution {resolution}: {e}")
+            return []  # Return an empty list so processing can continue.
+        return data if isinstance(data, list) else data.get("timestamps", [])
+
+    async def fetch_chunk(self, filter_id, region, resolution, timestamp, etag=None, last_modified=None, is_open=False):
+        """
+        Fetch one chunk file together with its SHA-256 content hash and HTTP
+        validators. Known ETag/Last-Modified values are sent as a conditional
+        request, so an unchanged chunk may come back as 304 without a body.
+        Closed chunks are served from the cache indefinitely; the open (latest)
+        chunk is always revalidated. Returns None on HTTP errors.
+        """
+        timeseries_url = (
+            f"{self.base_url}/{filter_id}/{region}/"
+            f"{filter_id}_{region}_{resolution}_{timestamp}.json"
+        )
+        print(f"Requesting time series data from: {timeseries_url}")
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            status, body, response_headers = await self._get(
+                timeseries_url, headers=headers, max_age=0 if is_open else None
+            )
+        except (aiohttp.ClientResponseError, FileNotFoundError) as e:
+            print(f"HTTP error occurred while fetching time series for filter {filter_id}, region {region}, resolution {resolution}, timestamp {timestamp}: {e}")
+            return None
+        if status == 304:
+            return ChunkResponse(None, None, etag, last_modified, True)
+        return ChunkResponse(
+            body,
+            hashlib.sha256(body).hexdigest(),
+            response_headers.get("ETag"),
+            response_headers.get("Last-Modified"),
+            False,
+        )